@@ -5,11 +5,23 @@ Google Apps Scriptから呼び出すためのFastAPI
 デプロイ先: Cloud Run / Render / Railway など
 """
 
+import asyncio
+import hashlib
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from typing import Any
-from fastapi import FastAPI, HTTPException
+
+import msgspec
+import numpy as np
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 from config import (
     DISC_LINES, DEFAULT_CAPACITIES, MONTHS,
@@ -19,10 +31,29 @@ from config import (
 from model import optimize, OptimizationResult
 from data_loader import PartSpec, PartDemand
 
+# ライン名の存在チェック用（O(1)のハッシュ判定。順序が必要な箇所はDISC_LINESを使う）
+_DISC_LINES_SET = frozenset(DISC_LINES)
+
+# 負荷率表示用のフォーマッタ（ホットな出力ループで毎回フォーマット式を
+# 解釈しないよう、束縛メソッドをモジュールレベルで1度だけ用意する）
+_format_pct = "{:.1%}".format
+
+# 12ヶ月分のゼロ詰めデフォルト。.get()の読み取り専用フォールバックとして
+# 使い回し、レスポンス生成のたびにリストを作り直さない（変更しないこと）
+_ZEROS12: tuple[int, ...] = (0,) * 12
+
+# ライン別デフォルト能力（欠損ライン補完用）。能力正規化や欠損補完は
+# ラインごとに毎回dict.get＋デフォルト値評価を行うため、import時に確定しておく
+_DEFAULT_CAPS_FILLED = {line: DEFAULT_CAPACITIES.get(line, 50000) for line in DISC_LINES}
+_DEFAULT_CAPS_ZERO = {line: DEFAULT_CAPACITIES.get(line, 0) for line in DISC_LINES}
+
 app = FastAPI(
     title="KIRIU ライン負荷最適化API",
     description="生産ラインの負荷を最適化するAPI",
     version="1.0.0",
+    # 比較系エンドポイントは数千個の数値を含むネスト配列を返すため、
+    # 標準jsonより高速なorjsonでシリアライズする
+    default_response_class=ORJSONResponse,
 )
 
 # CORS設定（GASからのアクセスを許可）
@@ -34,6 +65,121 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ソルバー実行用プロセスプール
+# optimize()はCPUバウンドのため、イベントループをブロックしないよう
+# 別プロセスで実行する（比較系エンドポイントではパターンを並列に解く）
+_SOLVER_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+# optimize()結果のメモ化キャッシュ
+# GASフロントエンドからの同一リクエスト再送や、比較エンドポイントで
+# 複数パターンの入力が一致するケースで、数秒〜数分のソルバー実行を省略する
+_OPTIMIZE_CACHE: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+_OPTIMIZE_CACHE_LOCK = threading.Lock()
+_OPTIMIZE_CACHE_MAXSIZE = 256
+_OPTIMIZE_CACHE_TTL = 3600  # 秒
+
+
+def _optimize_cache_key(specs, demands, capacities, time_limit, load_rate_limit=1.0) -> bytes:
+    """最適化入力のコンテンツハッシュを計算する（ソルバー結果に影響する項目のみ）"""
+    payload = (
+        [(pn, s.main_line, s.sub1_line, s.sub2_line) for pn, s in sorted(specs.items())],
+        [(pn, list(d.monthly_demand)) for pn, d in sorted(demands.items())],
+        sorted((capacities or {}).items()),
+        time_limit,
+        load_rate_limit,
+    )
+    return hashlib.blake2b(msgspec.msgpack.encode(payload)).digest()
+
+
+def _optimize_cache_get(key: bytes):
+    """キャッシュから結果を取得（期限切れはNone）"""
+    with _OPTIMIZE_CACHE_LOCK:
+        entry = _OPTIMIZE_CACHE.get(key)
+        if entry is None:
+            return None
+        timestamp, result = entry
+        if time.monotonic() - timestamp > _OPTIMIZE_CACHE_TTL:
+            del _OPTIMIZE_CACHE[key]
+            return None
+        _OPTIMIZE_CACHE.move_to_end(key)
+        return result
+
+
+def _optimize_cache_put(key: bytes, result) -> None:
+    """キャッシュに結果を格納（LRUで上限管理）"""
+    with _OPTIMIZE_CACHE_LOCK:
+        _OPTIMIZE_CACHE[key] = (time.monotonic(), result)
+        _OPTIMIZE_CACHE.move_to_end(key)
+        while len(_OPTIMIZE_CACHE) > _OPTIMIZE_CACHE_MAXSIZE:
+            _OPTIMIZE_CACHE.popitem(last=False)
+
+
+async def _optimize_offloaded(specs, demands, capacities, time_limit, load_rate_limit=1.0):
+    """キャッシュを参照しつつ、optimize()を別スレッドで実行する"""
+    key = _optimize_cache_key(specs, demands, capacities, time_limit, load_rate_limit)
+    result = _optimize_cache_get(key)
+    if result is None:
+        result = await asyncio.to_thread(
+            optimize, specs, demands, capacities, time_limit, load_rate_limit
+        )
+        _optimize_cache_put(key, result)
+    return result
+
+
+async def _solve_pattern(args, hint_allocation=None):
+    """1パターン分のoptimize()をキャッシュ参照つきでプロセスプール実行する"""
+    cache_key = _optimize_cache_key(*args)
+    cached = _optimize_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        _SOLVER_POOL, partial(optimize, *args, hint_allocation=hint_allocation)
+    )
+    _optimize_cache_put(cache_key, result)
+    return result
+
+
+async def _run_solver_patterns(keys, optimize_args, warm_start_key=None):
+    """複数パターンのoptimize()をプロセスプールで並列実行する
+
+    キャッシュ済みのパターンはソルバーを起動せずに即座に返す。
+    warm_start_keyを指定すると、そのパターンを先に解き、得られた割当を
+    残りパターンのCP-SAT探索ヒントとして渡す（ウォームスタート）。
+
+    Args:
+        keys: パターンのキーリスト（負荷率やパターン名）
+        optimize_args: 各パターンに対応するoptimize()の引数タプル
+        warm_start_key: 先行して解き、ヒント元にするパターンのキー
+
+    Returns:
+        {キー: OptimizationResult | None}（失敗したパターンはNone）
+    """
+    all_keys = list(keys)
+    args_by_key = dict(zip(all_keys, optimize_args))
+    results = {}
+    hint = None
+
+    pending_keys = all_keys
+    if warm_start_key in args_by_key:
+        try:
+            first = await _solve_pattern(args_by_key[warm_start_key])
+        except Exception:
+            first = None
+        results[warm_start_key] = first
+        if first is not None and first.allocation:
+            hint = first.allocation
+        pending_keys = [key for key in all_keys if key != warm_start_key]
+
+    solved = await asyncio.gather(
+        *[_solve_pattern(args_by_key[key], hint) for key in pending_keys],
+        return_exceptions=True,
+    )
+    for key, result in zip(pending_keys, solved):
+        results[key] = None if isinstance(result, BaseException) else result
+
+    return {key: results[key] for key in all_keys}
+
 
 class PartInput(BaseModel):
     """部品入力データ"""
@@ -42,7 +188,8 @@ class PartInput(BaseModel):
     main_line: str
     sub1_line: str | None = None
     sub2_line: str | None = None
-    monthly_demand: list[int]  # 12ヶ月分
+    # 12ヶ月分（長さはPydanticのコンパイル済みバリデータで検証する）
+    monthly_demand: list[int] = Field(min_length=12, max_length=12)
 
 
 class OptimizeRequest(BaseModel):
@@ -53,7 +200,9 @@ class OptimizeRequest(BaseModel):
     load_rate_limit: float = 1.0  # 負荷率上限（0.0〜1.0）
 
 
-class LineLoadOutput(BaseModel):
+# レスポンスはmsgspec.Structで定義し、Pydanticの出力再検証を回避して
+# msgspec.json.encode で直接シリアライズする（部品数に比例する整形コストを削減）
+class LineLoadOutput(msgspec.Struct):
     """ライン負荷出力"""
     line: str
     monthly_capacities: list[int]  # 月別能力
@@ -63,20 +212,20 @@ class LineLoadOutput(BaseModel):
     load_rate: float
 
 
-class UnmetDemandOutput(BaseModel):
+class UnmetDemandOutput(msgspec.Struct):
     """未割当出力"""
     part_number: str
     monthly_unmet: list[int]  # 月別未割当
     total_unmet: int
 
 
-class PartAllocationOutput(BaseModel):
+class PartAllocationOutput(msgspec.Struct):
     """部品割当出力"""
     part_number: str
     allocations: dict[str, list[int]]  # {ライン: [月別数量]}
 
 
-class OptimizeResponse(BaseModel):
+class OptimizeResponse(msgspec.Struct):
     """最適化レスポンス"""
     success: bool
     status: str
@@ -88,6 +237,187 @@ class OptimizeResponse(BaseModel):
     summary: dict[str, Any]
 
 
+def _json_response(obj) -> Response:
+    """msgspecでエンコードしたJSONレスポンスを返す"""
+    return Response(content=msgspec.json.encode(obj), media_type="application/json")
+
+
+def _normalize_caps(caps) -> dict[str, list[int]]:
+    """能力辞書をライン×12ヶ月のリスト形式に正規化する
+
+    比較エンドポイントでは同一の能力辞書で複数パターンを解くため、
+    ハッシュ可能なキーに変換してlru_cacheで正規化結果を再利用する。
+    """
+    key = tuple(
+        (line, tuple(cap) if isinstance(cap, list) else cap)
+        for line, cap in sorted(caps.items())
+    )
+    return _normalize_caps_cached(key)
+
+
+@lru_cache(maxsize=128)
+def _normalize_caps_cached(caps_items: tuple) -> dict[str, list[int]]:
+    """_normalize_caps()の実体（呼び出し側は正規化結果を変更しないこと）"""
+    caps = dict(caps_items)
+    normalized = {}
+    for line in DISC_LINES:
+        cap = caps.get(line, _DEFAULT_CAPS_ZERO[line])
+        if isinstance(cap, tuple):
+            normalized[line] = list((cap + (cap[-1],) * 12)[:12]) if cap else [0] * 12
+        else:
+            normalized[line] = [cap] * 12
+    return normalized
+
+
+def _monthly_matrix(monthly_by_line: dict[str, list[int]]) -> np.ndarray:
+    """ライン別月別データを(ライン数, 12)のint64行列に変換する
+
+    平均・年間計・負荷率などの集計をPythonループではなく
+    NumPyの一括演算（sum/mean axis=1）で行うための前処理。
+    """
+    return np.array(
+        [monthly_by_line.get(line, _ZEROS12) for line in DISC_LINES],
+        dtype=np.int64,
+    )
+
+
+def _total_demand(demands) -> int:
+    """全部品の年間総需要を一括集計する"""
+    if not demands:
+        return 0
+    return int(np.array([d.monthly_demand for d in demands.values()], dtype=np.int64).sum())
+
+
+def _total_unmet(unmet_demand) -> int:
+    """全部品の未割当数量合計を一括集計する"""
+    if not unmet_demand:
+        return 0
+    return int(np.array(list(unmet_demand.values()), dtype=np.int64).sum())
+
+
+def _emit_pattern_tables(result, avg_caps, avg_loads):
+    """1パターン分のスプレッドシート用出力テーブルを構築する
+
+    Returns:
+        (ライン負荷配列, 部品割当配列, 未割当配列, 未割当がある部品番号の集合)
+    """
+    line_loads_array = [["ライン"] + MONTHS + ["平均能力", "平均負荷", "負荷率"]]
+    for i, line in enumerate(DISC_LINES):
+        loads = result.line_loads.get(line, _ZEROS12)
+        avg_cap = float(avg_caps[i])
+        avg_load = float(avg_loads[i])
+        load_rate_val = avg_load / avg_cap if avg_cap > 0 else 0
+        row = [line]
+        row.extend(loads)
+        row.extend((int(avg_cap), int(avg_load), _format_pct(load_rate_val)))
+        line_loads_array.append(row)
+
+    alloc_array = [["部品番号", "割当ライン"] + MONTHS + ["年間計"]]
+    for part_num in sorted(result.allocation.keys()):
+        for line, monthly in result.allocation[part_num].items():
+            total = sum(monthly)
+            if total > 0:
+                row = [part_num, line]
+                row.extend(monthly)
+                row.append(total)
+                alloc_array.append(row)
+
+    unmet_array = [["部品番号"] + MONTHS + ["年間計"]]
+    unmet_parts = set()
+    if result.unmet_demand:
+        for part_num in sorted(result.unmet_demand.keys()):
+            monthly_unmet = result.unmet_demand[part_num]
+            total = sum(monthly_unmet)
+            if total > 0:
+                unmet_parts.add(part_num)
+                row = [part_num]
+                row.extend(monthly_unmet)
+                row.append(total)
+                unmet_array.append(row)
+
+    return line_loads_array, alloc_array, unmet_array, unmet_parts
+
+
+async def _stream_pattern_sections(
+    meta, keys, labels, optimize_args, summary_header,
+    avg_caps_by_key, total_caps_by_key,
+):
+    """比較結果をパターン単位のNDJSON行としてストリーム生成する
+
+    先頭行にメタ情報（type=meta）を送り、以降は解き終わったパターンから
+    順に詳細テーブル（type=pattern）を1行ずつ送る。全パターン完了後、
+    最終行で比較サマリー（type=summary）を送る。全結果の完成を待たずに
+    送信を始められるため、大規模データでも最初の応答が速く、
+    サーバー側でも全パターン分の結果を同時に保持しない。
+
+    Args:
+        meta: 先頭行で送るメタ情報の辞書
+        keys: パターンのキーリスト（負荷率やパターン名）
+        labels: 出力に使うパターン表示名（keysと同順）
+        optimize_args: 各パターンに対応するoptimize()の引数タプル
+        summary_header: 比較サマリーのヘッダ行
+        avg_caps_by_key: {キー: ライン別平均能力の配列}
+        total_caps_by_key: {キー: 年間能力合計}
+    """
+    yield msgspec.json.encode(meta) + b"\n"
+
+    label_by_key = dict(zip(keys, labels))
+    tasks = {
+        asyncio.create_task(_solve_pattern(args)): key
+        for key, args in zip(keys, optimize_args)
+    }
+    summary_rows = {}
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            key = tasks[task]
+            label = label_by_key[key]
+            try:
+                result = task.result()
+            except Exception:
+                result = None
+            if result is None:
+                summary_rows[key] = [label, "ERROR", "", "", "", ""]
+                yield msgspec.json.encode(
+                    {"type": "pattern", "pattern": label, "status": "ERROR"}
+                ) + b"\n"
+                continue
+
+            loads_arr = _monthly_matrix(result.line_loads)
+            total_cap = total_caps_by_key[key]
+            avg_rate_val = int(loads_arr.sum()) / total_cap if total_cap > 0 else 0
+            total_unmet = _total_unmet(result.unmet_demand)
+            line_loads_array, alloc_array, unmet_array, _ = _emit_pattern_tables(
+                result, avg_caps_by_key[key], loads_arr.mean(axis=1)
+            )
+            summary_rows[key] = [
+                label,
+                result.status,
+                result.objective_value,
+                round(result.solve_time, 2),
+                _format_pct(avg_rate_val),
+                total_unmet,
+            ]
+            yield msgspec.json.encode({
+                "type": "pattern",
+                "pattern": label,
+                "status": result.status,
+                "objective_value": result.objective_value,
+                "solve_time": result.solve_time,
+                "total_unmet": total_unmet,
+                "line_loads": line_loads_array,
+                "allocations": alloc_array,
+                "unmet_demands": unmet_array,
+            }) + b"\n"
+
+    yield msgspec.json.encode({
+        "type": "summary",
+        "success": any(row[1] in ('OPTIMAL', 'FEASIBLE') for row in summary_rows.values()),
+        "comparison_summary": [summary_header] + [summary_rows[key] for key in keys],
+    }) + b"\n"
+
+
 @app.get("/")
 def root():
     """ヘルスチェック"""
@@ -104,8 +434,8 @@ def get_lines():
     }
 
 
-@app.post("/optimize", response_model=OptimizeResponse)
-def run_optimization(request: OptimizeRequest):
+@app.post("/optimize")
+async def run_optimization(request: OptimizeRequest):
     """
     最適化を実行
 
@@ -131,24 +461,18 @@ def run_optimization(request: OptimizeRequest):
     demands = {}
 
     for part in request.parts:
-        if part.main_line not in DISC_LINES:
+        if part.main_line not in _DISC_LINES_SET:
             raise HTTPException(
                 status_code=400,
                 detail=f"無効なメインライン: {part.main_line}。有効なライン: {DISC_LINES}"
             )
 
-        if len(part.monthly_demand) != 12:
-            raise HTTPException(
-                status_code=400,
-                detail=f"部品 {part.part_number} の月別需要は12ヶ月分必要です"
-            )
-
         specs[part.part_number] = PartSpec(
             part_number=part.part_number,
             part_name=part.part_name,
             main_line=part.main_line,
-            sub1_line=part.sub1_line if part.sub1_line in DISC_LINES else None,
-            sub2_line=part.sub2_line if part.sub2_line in DISC_LINES else None,
+            sub1_line=part.sub1_line if part.sub1_line in _DISC_LINES_SET else None,
+            sub2_line=part.sub2_line if part.sub2_line in _DISC_LINES_SET else None,
         )
 
         demands[part.part_number] = PartDemand(
@@ -163,40 +487,36 @@ def run_optimization(request: OptimizeRequest):
     # 不足しているラインのデフォルト能力を追加
     for line in DISC_LINES:
         if line not in capacities:
-            capacities[line] = DEFAULT_CAPACITIES.get(line, 50000)
+            capacities[line] = _DEFAULT_CAPS_FILLED[line]
 
-    # 最適化実行
+    # 最適化実行（CPUバウンドのため別スレッドへオフロード）
     try:
-        result = optimize(specs, demands, capacities, request.time_limit, request.load_rate_limit)
+        result = await _optimize_offloaded(
+            specs, demands, capacities, request.time_limit, request.load_rate_limit
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"最適化エラー: {str(e)}")
 
     # 月別能力を正規化
-    def normalize_caps(caps):
-        result = {}
-        for line in DISC_LINES:
-            cap = caps.get(line, DEFAULT_CAPACITIES.get(line, 0))
-            if isinstance(cap, list):
-                result[line] = (cap + [cap[-1]] * 12)[:12] if cap else [0] * 12
-            else:
-                result[line] = [cap] * 12
-        return result
+    monthly_capacities = _normalize_caps(capacities)
 
-    monthly_capacities = normalize_caps(capacities)
+    # ライン×月の行列に変換して平均をまとめて計算
+    caps_arr = _monthly_matrix(monthly_capacities)
+    loads_arr = _monthly_matrix(result.line_loads)
+    avg_caps = caps_arr.mean(axis=1)
+    avg_loads = loads_arr.mean(axis=1)
 
     # 結果を整形
     line_loads = []
-    for line in DISC_LINES:
-        loads = result.line_loads.get(line, [0] * 12)
-        line_caps = monthly_capacities.get(line, [0] * 12)
-        avg_cap = sum(line_caps) / 12
-        avg_load = sum(loads) / 12
+    for i, line in enumerate(DISC_LINES):
+        avg_cap = float(avg_caps[i])
+        avg_load = float(avg_loads[i])
         load_rate = avg_load / avg_cap if avg_cap > 0 else 0
 
         line_loads.append(LineLoadOutput(
             line=line,
-            monthly_capacities=line_caps,
-            monthly_loads=loads,
+            monthly_capacities=monthly_capacities.get(line, _ZEROS12),
+            monthly_loads=result.line_loads.get(line, _ZEROS12),
             avg_capacity=avg_cap,
             avg_load=avg_load,
             load_rate=load_rate,
@@ -213,17 +533,18 @@ def run_optimization(request: OptimizeRequest):
     unmet_demands = []
     if result.unmet_demand:
         for part_num, monthly_unmet in result.unmet_demand.items():
-            if sum(monthly_unmet) > 0:
+            total = sum(monthly_unmet)
+            if total > 0:
                 unmet_demands.append(UnmetDemandOutput(
                     part_number=part_num,
                     monthly_unmet=monthly_unmet,
-                    total_unmet=sum(monthly_unmet),
+                    total_unmet=total,
                 ))
 
     # サマリー
-    total_demand = sum(sum(d.monthly_demand) for d in demands.values())
-    total_capacity = sum(sum(caps) for caps in monthly_capacities.values())
-    total_unmet = sum(u.total_unmet for u in unmet_demands)
+    total_demand = _total_demand(demands)
+    total_capacity = int(caps_arr.sum())
+    total_unmet = _total_unmet(result.unmet_demand)
 
     summary = {
         "total_parts": len(specs),
@@ -234,7 +555,7 @@ def run_optimization(request: OptimizeRequest):
         "unmet_parts_count": len(unmet_demands),
     }
 
-    return OptimizeResponse(
+    return _json_response(OptimizeResponse(
         success=result.status in ('OPTIMAL', 'FEASIBLE'),
         status=result.status,
         objective_value=result.objective_value,
@@ -243,7 +564,7 @@ def run_optimization(request: OptimizeRequest):
         allocations=allocations,
         unmet_demands=unmet_demands,
         summary=summary,
-    )
+    ))
 
 
 # ============================================================
@@ -266,7 +587,8 @@ def _parse_simple_request(request: SimpleOptimizeRequest):
     同一部品番号・同一ラインの行が複数ある場合は需要量を合算する。
     """
     specs = {}
-    demands = {}
+    # 部品番号ごとの月別需要はint64ベクトルで合算し、最後にPartDemandへ変換する
+    demand_acc: dict[str, np.ndarray] = {}
 
     for row in request.parts_data:
         if len(row) < 16:
@@ -280,18 +602,26 @@ def _parse_simple_request(request: SimpleOptimizeRequest):
         sub1_line = str(row[2]).strip() if row[2] else None
         sub2_line = str(row[3]).strip() if row[3] else None
 
-        if not main_line or main_line not in DISC_LINES:
+        if not main_line or main_line not in _DISC_LINES_SET:
             continue
 
-        monthly = []
-        for i in range(4, 16):
-            try:
-                val = int(float(row[i])) if row[i] else 0
-            except (ValueError, TypeError):
-                val = 0
-            monthly.append(max(0, val))
+        # 月別需要のパース
+        # GASからは数値セルが数値型のまま届くことが多いため、まず一括変換の
+        # 高速パスを試し、空文字や小数文字列を含む行のみセル単位で処理する
+        raw_monthly = row[4:16]
+        try:
+            monthly = [v if v > 0 else 0 for v in map(int, raw_monthly)]
+        except (ValueError, TypeError):
+            monthly = []
+            for raw in raw_monthly:
+                try:
+                    val = int(float(raw)) if raw else 0
+                except (ValueError, TypeError):
+                    val = 0
+                monthly.append(max(0, val))
 
-        if sum(monthly) == 0:
+        # any()は最初の非ゼロ月で打ち切れるため、全12要素のsumより速い
+        if not any(monthly):
             continue
 
         # 仕様を登録（最初に見つかったものを使用）
@@ -300,32 +630,37 @@ def _parse_simple_request(request: SimpleOptimizeRequest):
                 part_number=part_num,
                 part_name='',
                 main_line=main_line,
-                sub1_line=sub1_line if sub1_line in DISC_LINES else None,
-                sub2_line=sub2_line if sub2_line in DISC_LINES else None,
+                sub1_line=sub1_line if sub1_line in _DISC_LINES_SET else None,
+                sub2_line=sub2_line if sub2_line in _DISC_LINES_SET else None,
             )
 
-        # 同一部品番号の複数行は需要を合算
-        if part_num in demands:
-            existing = demands[part_num]
-            for i in range(12):
-                existing.monthly_demand[i] += monthly[i]
+        # 同一部品番号の複数行は需要を合算（12要素のベクトル加算1回で済ませる）
+        monthly_arr = np.asarray(monthly, dtype=np.int64)
+        if part_num in demand_acc:
+            demand_acc[part_num] += monthly_arr
         else:
-            demands[part_num] = PartDemand(
-                part_number=part_num,
-                part_name='',
-                monthly_demand=monthly,
-            )
+            demand_acc[part_num] = monthly_arr
 
     if not specs:
         raise HTTPException(status_code=400, detail="有効な部品データがありません")
 
+    # 合算結果をPython intのリストへ戻す（ソルバー・キャッシュキーは素のintを期待する）
+    demands = {
+        part_num: PartDemand(
+            part_number=part_num,
+            part_name='',
+            monthly_demand=acc.tolist(),
+        )
+        for part_num, acc in demand_acc.items()
+    }
+
     capacities = {}
     if request.capacities_data:
         for row in request.capacities_data:
             if len(row) < 2:
                 continue
             line = str(row[0]).strip()
-            if line not in DISC_LINES or line == 'ライン':
+            if line not in _DISC_LINES_SET or line == 'ライン':
                 continue
 
             if len(row) >= 13:
@@ -334,7 +669,7 @@ def _parse_simple_request(request: SimpleOptimizeRequest):
                     try:
                         val = int(float(row[i])) if row[i] else 0
                     except (ValueError, TypeError):
-                        val = DEFAULT_CAPACITIES.get(line, 50000)
+                        val = _DEFAULT_CAPS_FILLED[line]
                     monthly_caps.append(max(0, val))
                 capacities[line] = monthly_caps
             else:
@@ -346,13 +681,13 @@ def _parse_simple_request(request: SimpleOptimizeRequest):
 
     for line in DISC_LINES:
         if line not in capacities:
-            capacities[line] = DEFAULT_CAPACITIES.get(line, 50000)
+            capacities[line] = _DEFAULT_CAPS_FILLED[line]
 
     return specs, demands, capacities
 
 
 @app.post("/optimize/simple")
-def run_simple_optimization(request: SimpleOptimizeRequest):
+async def run_simple_optimization(request: SimpleOptimizeRequest):
     """
     シンプル版最適化（スプレッドシートから直接呼び出し用）
 
@@ -365,56 +700,73 @@ def run_simple_optimization(request: SimpleOptimizeRequest):
     """
     specs, demands, capacities = _parse_simple_request(request)
 
-    # 最適化実行
-    result = optimize(specs, demands, capacities, request.time_limit, request.load_rate_limit)
+    # 最適化実行（CPUバウンドのため別スレッドへオフロード）
+    result = await _optimize_offloaded(
+        specs, demands, capacities, request.time_limit, request.load_rate_limit
+    )
 
     # 月別能力を正規化
-    def normalize_caps(caps):
-        result = {}
-        for line in DISC_LINES:
-            cap = caps.get(line, DEFAULT_CAPACITIES.get(line, 0))
-            if isinstance(cap, list):
-                result[line] = (cap + [cap[-1]] * 12)[:12] if cap else [0] * 12
-            else:
-                result[line] = [cap] * 12
-        return result
+    monthly_capacities = _normalize_caps(capacities)
 
-    monthly_capacities = normalize_caps(capacities)
+    # ライン×月の行列に変換して平均をまとめて計算
+    caps_arr = _monthly_matrix(monthly_capacities)
+    loads_arr = _monthly_matrix(result.line_loads)
+    avg_caps = caps_arr.mean(axis=1)
+    avg_loads = loads_arr.mean(axis=1)
 
     # スプレッドシート用の2次元配列形式で返す
     # ライン負荷結果（月別能力対応）
     line_loads_array = [["ライン"] + MONTHS + ["平均能力", "平均負荷", "負荷率"]]
-    for line in DISC_LINES:
-        loads = result.line_loads.get(line, [0] * 12)
-        line_caps = monthly_capacities.get(line, [0] * 12)
-        avg_cap = sum(line_caps) / 12
-        avg_load = sum(loads) / 12
+    for i, line in enumerate(DISC_LINES):
+        loads = result.line_loads.get(line, _ZEROS12)
+        avg_cap = float(avg_caps[i])
+        avg_load = float(avg_loads[i])
         rate = avg_load / avg_cap if avg_cap > 0 else 0
-        line_loads_array.append([line] + loads + [int(avg_cap), int(avg_load), f"{rate:.1%}"])
+        row = [line]
+        row.extend(loads)
+        row.extend((int(avg_cap), int(avg_load), _format_pct(rate)))
+        line_loads_array.append(row)
 
-    # キャパシティ行を追加
-    cap_row = ["キャパシティ"] + [monthly_capacities[DISC_LINES[0]][m] for m in range(12)] + ["", "", ""]
     # 各ラインのキャパシティ用に別配列
     capacity_array = [["ライン"] + MONTHS]
     for line in DISC_LINES:
-        capacity_array.append([line] + monthly_capacities[line])
+        row = [line]
+        row.extend(monthly_capacities[line])
+        capacity_array.append(row)
 
-    # 部品割当結果
+    # 部品割当結果（年間計は部品×ライン行をまとめた行列の一括リダクションで計算）
     alloc_array = [["部品番号", "割当ライン"] + MONTHS + ["年間計"]]
-    for part_num in sorted(result.allocation.keys()):
-        for line, monthly in result.allocation[part_num].items():
-            if sum(monthly) > 0:
-                alloc_array.append([part_num, line] + monthly + [sum(monthly)])
+    alloc_entries = [
+        (part_num, line, monthly)
+        for part_num in sorted(result.allocation.keys())
+        for line, monthly in result.allocation[part_num].items()
+    ]
+    if alloc_entries:
+        alloc_totals = np.array(
+            [monthly for _, _, monthly in alloc_entries], dtype=np.int64
+        ).sum(axis=1)
+        for (part_num, line, monthly), total in zip(alloc_entries, alloc_totals.tolist()):
+            if total > 0:
+                row = [part_num, line]
+                row.extend(monthly)
+                row.append(total)
+                alloc_array.append(row)
 
     # 未割当結果
     unmet_array = [["部品番号"] + MONTHS + ["年間計"]]
     total_unmet = 0
     if result.unmet_demand:
-        for part_num in sorted(result.unmet_demand.keys()):
-            monthly_unmet = result.unmet_demand[part_num]
-            if sum(monthly_unmet) > 0:
-                unmet_array.append([part_num] + monthly_unmet + [sum(monthly_unmet)])
-                total_unmet += sum(monthly_unmet)
+        unmet_keys = sorted(result.unmet_demand.keys())
+        unmet_totals = np.array(
+            [result.unmet_demand[pn] for pn in unmet_keys], dtype=np.int64
+        ).sum(axis=1)
+        total_unmet = int(unmet_totals.sum())
+        for part_num, total in zip(unmet_keys, unmet_totals.tolist()):
+            if total > 0:
+                row = [part_num]
+                row.extend(result.unmet_demand[part_num])
+                row.append(total)
+                unmet_array.append(row)
 
     return {
         "success": result.status in ('OPTIMAL', 'FEASIBLE'),
@@ -426,7 +778,7 @@ def run_simple_optimization(request: SimpleOptimizeRequest):
         "allocations": alloc_array,
         "unmet_demands": unmet_array,
         "parts_count": len(specs),
-        "total_demand": sum(sum(d.monthly_demand) for d in demands.values()),
+        "total_demand": _total_demand(demands),
         "total_unmet": total_unmet,
     }
 
@@ -444,15 +796,19 @@ class CompareOptimizeRequest(BaseModel):
     capacities_data: list[list[Any]] | None = None
     time_limit: int = 60
     load_rate_patterns: list[float] | None = None  # カスタムパターン（省略時は100/90/80%）
+    stream: bool = False  # TrueでNDJSONストリーム応答（パターンごとに逐次送信）
 
 
 @app.post("/optimize/simple/compare")
-def run_compare_optimization(request: CompareOptimizeRequest):
+async def run_compare_optimization(request: CompareOptimizeRequest):
     """
     複数負荷率パターンで最適化を実行し、比較結果を返す
 
     3パターン（100%/90%/80%）で最適化を実行し、
     各パターンの結果と比較サマリーをスプレッドシート用の2次元配列で返す
+
+    stream=Trueの場合は1つのJSONではなくNDJSONで応答し、
+    解き終わったパターンから順に1行ずつ送信する
     """
     # SimpleOptimizeRequestと同じパース処理を利用
     simple_req = SimpleOptimizeRequest(
@@ -465,47 +821,99 @@ def run_compare_optimization(request: CompareOptimizeRequest):
     patterns = request.load_rate_patterns or LOAD_RATE_PATTERNS
 
     # 月別能力を正規化
-    def normalize_caps(caps):
-        normalized = {}
-        for line in DISC_LINES:
-            cap = caps.get(line, DEFAULT_CAPACITIES.get(line, 0))
-            if isinstance(cap, list):
-                normalized[line] = (cap + [cap[-1]] * 12)[:12] if cap else [0] * 12
-            else:
-                normalized[line] = [cap] * 12
-        return normalized
+    monthly_capacities = _normalize_caps(capacities)
 
-    monthly_capacities = normalize_caps(capacities)
+    # ライン×月の行列に変換して平均・合計をまとめて計算
+    caps_arr = _monthly_matrix(monthly_capacities)
+    avg_caps = caps_arr.mean(axis=1)
+    total_cap_annual = int(caps_arr.sum())
 
-    # 各パターンで最適化実行
-    pattern_results = {}
-    for rate in patterns:
-        try:
-            result = optimize(specs, demands, capacities, request.time_limit, load_rate_limit=rate)
-            pattern_results[rate] = result
-        except Exception as e:
-            pattern_results[rate] = None
+    optimize_args = [
+        (specs, demands, capacities, request.time_limit, rate) for rate in patterns
+    ]
+
+    # ストリームモード: 解き終わったパターンから順にNDJSONで送信する
+    if request.stream:
+        cap_array = [["ライン"] + MONTHS]
+        for line in DISC_LINES:
+            row = [line]
+            row.extend(monthly_capacities[line])
+            cap_array.append(row)
+        meta = {
+            "type": "meta",
+            "patterns": [int(r * 100) for r in patterns],
+            "parts_count": len(specs),
+            "total_demand": _total_demand(demands),
+            "capacities": cap_array,
+        }
+        return StreamingResponse(
+            _stream_pattern_sections(
+                meta,
+                patterns,
+                [f"{int(r * 100)}%" for r in patterns],
+                optimize_args,
+                ["負荷率上限", "ステータス", "目的関数値", "実行時間(秒)", "平均負荷率", "未割当合計"],
+                {rate: avg_caps for rate in patterns},
+                {rate: total_cap_annual for rate in patterns},
+            ),
+            media_type="application/x-ndjson",
+        )
 
-    # === パターン比較サマリー（2次元配列） ===
+    # 各パターンで最適化を実行
+    # 最も緩い負荷率を先に解き、その割当を残りパターンの探索ヒントにする
+    pattern_results = await _run_solver_patterns(
+        patterns, optimize_args, warm_start_key=max(patterns)
+    )
+    pattern_loads_arr = {
+        rate: _monthly_matrix(result.line_loads) if result is not None else None
+        for rate, result in pattern_results.items()
+    }
+    pattern_avg_loads = {
+        rate: arr.mean(axis=1) if arr is not None else None
+        for rate, arr in pattern_loads_arr.items()
+    }
+
+    # === パターン別出力の一括生成 ===
+    # サマリー・月別負荷・部品割当・未割当詳細をパターンごとの1パスで構築し、
+    # pattern_resultsの再参照と同じ配列の再集計を避ける
     summary_array = [["負荷率上限", "ステータス", "目的関数値", "実行時間(秒)", "平均負荷率", "未割当合計"]]
+    all_unmet_parts = set()
+    patterns_line_loads = {}
+    patterns_allocations = {}
+    patterns_unmet = {}
     for rate in patterns:
+        pct = int(rate * 100)
+        pct_key = f"{pct}pct"
         result = pattern_results[rate]
         if result is None:
-            summary_array.append([f"{int(rate * 100)}%", "ERROR", "", "", "", ""])
+            summary_array.append([f"{pct}%", "ERROR", "", "", "", ""])
+            patterns_line_loads[pct_key] = []
+            patterns_allocations[pct_key] = []
+            patterns_unmet[pct_key] = []
             continue
-        total_load = sum(sum(loads) for loads in result.line_loads.values())
-        total_cap_annual = sum(sum(c) for c in monthly_capacities.values())
+
+        # サマリー行
+        total_load = int(pattern_loads_arr[rate].sum())
         avg_rate_val = total_load / total_cap_annual if total_cap_annual > 0 else 0
-        total_unmet = sum(sum(u) for u in result.unmet_demand.values()) if result.unmet_demand else 0
+        total_unmet = _total_unmet(result.unmet_demand)
         summary_array.append([
-            f"{int(rate * 100)}%",
+            f"{pct}%",
             result.status,
             result.objective_value,
             round(result.solve_time, 2),
-            f"{avg_rate_val:.1%}",
+            _format_pct(avg_rate_val),
             total_unmet,
         ])
 
+        # ライン別月別負荷・部品割当・未割当詳細
+        line_loads_array, alloc_array, unmet_array, unmet_parts = _emit_pattern_tables(
+            result, avg_caps, pattern_avg_loads[rate]
+        )
+        patterns_line_loads[pct_key] = line_loads_array
+        patterns_allocations[pct_key] = alloc_array
+        patterns_unmet[pct_key] = unmet_array
+        all_unmet_parts |= unmet_parts
+
     # === ライン別負荷率比較（2次元配列） ===
     line_comparison_header = ["ライン", "平均能力"]
     for rate in patterns:
@@ -513,72 +921,24 @@ def run_compare_optimization(request: CompareOptimizeRequest):
         line_comparison_header.extend([f"平均負荷({pct}%)", f"負荷率({pct}%)"])
     line_comparison_array = [line_comparison_header]
 
-    for line in DISC_LINES:
-        line_caps = monthly_capacities.get(line, [0] * 12)
-        avg_cap = sum(line_caps) / 12
+    for i, line in enumerate(DISC_LINES):
+        avg_cap = float(avg_caps[i])
         row = [line, int(avg_cap)]
         for rate in patterns:
-            result = pattern_results[rate]
-            if result is None:
+            if pattern_avg_loads[rate] is None:
                 row.extend(["", ""])
                 continue
-            loads = result.line_loads.get(line, [0] * 12)
-            avg_load = sum(loads) / 12
+            avg_load = float(pattern_avg_loads[rate][i])
             load_rate_val = avg_load / avg_cap if avg_cap > 0 else 0
-            row.extend([int(avg_load), f"{load_rate_val:.1%}"])
+            row.extend([int(avg_load), _format_pct(load_rate_val)])
         line_comparison_array.append(row)
 
-    # === ライン別月別負荷（パターン別、2次元配列） ===
-    # 各パターンのライン負荷を個別に返す
-    patterns_line_loads = {}
-    for rate in patterns:
-        pct = int(rate * 100)
-        result = pattern_results[rate]
-        if result is None:
-            patterns_line_loads[f"{pct}pct"] = []
-            continue
-
-        line_loads_array = [["ライン"] + MONTHS + ["平均能力", "平均負荷", "負荷率"]]
-        for line in DISC_LINES:
-            loads = result.line_loads.get(line, [0] * 12)
-            line_caps = monthly_capacities.get(line, [0] * 12)
-            avg_cap = sum(line_caps) / 12
-            avg_load = sum(loads) / 12
-            load_rate_val = avg_load / avg_cap if avg_cap > 0 else 0
-            line_loads_array.append(
-                [line] + loads + [int(avg_cap), int(avg_load), f"{load_rate_val:.1%}"]
-            )
-        patterns_line_loads[f"{pct}pct"] = line_loads_array
-
-    # === 部品割当（パターン別） ===
-    patterns_allocations = {}
-    for rate in patterns:
-        pct = int(rate * 100)
-        result = pattern_results[rate]
-        if result is None:
-            patterns_allocations[f"{pct}pct"] = []
-            continue
-
-        alloc_array = [["部品番号", "割当ライン"] + MONTHS + ["年間計"]]
-        for part_num in sorted(result.allocation.keys()):
-            for line, monthly in result.allocation[part_num].items():
-                if sum(monthly) > 0:
-                    alloc_array.append([part_num, line] + monthly + [sum(monthly)])
-        patterns_allocations[f"{pct}pct"] = alloc_array
-
     # === 未割当比較（2次元配列） ===
     unmet_comparison_header = ["部品番号"]
     for rate in patterns:
         unmet_comparison_header.append(f"未割当({int(rate * 100)}%)")
     unmet_comparison_array = [unmet_comparison_header]
 
-    all_unmet_parts = set()
-    for result in pattern_results.values():
-        if result and result.unmet_demand:
-            for part_num, monthly in result.unmet_demand.items():
-                if sum(monthly) > 0:
-                    all_unmet_parts.add(part_num)
-
     for part_num in sorted(all_unmet_parts):
         row = [part_num]
         for rate in patterns:
@@ -589,25 +949,8 @@ def run_compare_optimization(request: CompareOptimizeRequest):
                 row.append(0)
         unmet_comparison_array.append(row)
 
-    # === パターン別未割当詳細 ===
-    patterns_unmet = {}
-    for rate in patterns:
-        pct = int(rate * 100)
-        result = pattern_results[rate]
-        if result is None:
-            patterns_unmet[f"{pct}pct"] = []
-            continue
-
-        unmet_array = [["部品番号"] + MONTHS + ["年間計"]]
-        if result.unmet_demand:
-            for part_num in sorted(result.unmet_demand.keys()):
-                monthly_unmet = result.unmet_demand[part_num]
-                if sum(monthly_unmet) > 0:
-                    unmet_array.append([part_num] + monthly_unmet + [sum(monthly_unmet)])
-        patterns_unmet[f"{pct}pct"] = unmet_array
-
     # 全体サマリー
-    total_demand = sum(sum(d.monthly_demand) for d in demands.values())
+    total_demand = _total_demand(demands)
     first_result = pattern_results.get(patterns[0])
 
     return {
@@ -627,8 +970,8 @@ def run_compare_optimization(request: CompareOptimizeRequest):
         "patterns_allocations": patterns_allocations,
         "patterns_unmet": patterns_unmet,
         # キャパシティ（共通）
-        "capacities": [["ライン"] + MONTHS]
-            + [[line] + monthly_capacities[line] for line in DISC_LINES],
+        "capacities": [["ライン", *MONTHS]]
+            + [[line, *monthly_capacities[line]] for line in DISC_LINES],
     }
 
 
@@ -650,19 +993,23 @@ class CompareByWorkPatternRequest(BaseModel):
     work_patterns: list[WorkPatternInput] | None = None
     monthly_working_days: list[float] | None = None   # 12ヶ月分
     time_limit: int = 60
+    stream: bool = False  # TrueでNDJSONストリーム応答（パターンごとに逐次送信）
 
 
 @app.post("/optimize/simple/compare-patterns")
-def run_work_pattern_comparison(request: CompareByWorkPatternRequest):
+async def run_work_pattern_comparison(request: CompareByWorkPatternRequest):
     """
     勤務体制パターンごとに能力を計算し、最適化を実行して比較結果を返す
 
     jph_data形式: [["ライン", "JPH"], ["4915", 350], ...]
     work_patterns形式: [{"name": "2直2交替", "formula": "...", "exclusion_hours": 5}, ...]
     monthly_working_days形式: [20, 19, 21, ...]  (12ヶ月分)
+
+    stream=Trueの場合は1つのJSONではなくNDJSONで応答し、
+    解き終わったパターンから順に1行ずつ送信する
     """
     try:
-        return _run_work_pattern_comparison_impl(request)
+        return await _run_work_pattern_comparison_impl(request)
     except HTTPException:
         raise
     except Exception as e:
@@ -671,7 +1018,7 @@ def run_work_pattern_comparison(request: CompareByWorkPatternRequest):
         raise HTTPException(status_code=500, detail=f"勤務体制パターン比較エラー: {str(e)}")
 
 
-def _run_work_pattern_comparison_impl(request: CompareByWorkPatternRequest):
+async def _run_work_pattern_comparison_impl(request: CompareByWorkPatternRequest):
     """勤務体制パターン比較の実装"""
     # parts_data パース（既存の _parse_simple_request を再利用）
     simple_req = SimpleOptimizeRequest(
@@ -688,7 +1035,7 @@ def _run_work_pattern_comparison_impl(request: CompareByWorkPatternRequest):
             if len(row) < 2:
                 continue
             line = str(row[0]).strip()
-            if line not in DISC_LINES or line == 'ライン':
+            if line not in _DISC_LINES_SET or line == 'ライン':
                 continue
             try:
                 jph[line] = float(row[1]) if row[1] else 0
@@ -714,124 +1061,138 @@ def _run_work_pattern_comparison_impl(request: CompareByWorkPatternRequest):
 
     # パターン別能力計算
     pattern_capacities = calculate_monthly_capacities(jph, patterns, working_days)
+    pattern_names = [p.name for p in patterns]
 
-    # 各パターンで最適化実行
-    pattern_results = {}
-    for pattern_name, capacities in pattern_capacities.items():
-        try:
-            result = optimize(specs, demands, capacities, request.time_limit)
-            pattern_results[pattern_name] = result
-        except Exception:
-            pattern_results[pattern_name] = None
+    # ライン×月の行列に変換して平均・合計をまとめて計算（パターン別）
+    pattern_caps_arr = {
+        name: _monthly_matrix(capacities)
+        for name, capacities in pattern_capacities.items()
+    }
+    pattern_avg_caps = {name: arr.mean(axis=1) for name, arr in pattern_caps_arr.items()}
 
-    pattern_names = [p.name for p in patterns]
+    optimize_args = [
+        (specs, demands, capacities, request.time_limit)
+        for capacities in pattern_capacities.values()
+    ]
+
+    # ストリームモード: 解き終わったパターンから順にNDJSONで送信する
+    if request.stream:
+        patterns_capacities_output = {}
+        for name, capacities in pattern_capacities.items():
+            cap_array = [["ライン"] + MONTHS]
+            for line in DISC_LINES:
+                row = [line]
+                row.extend(capacities.get(line, _ZEROS12))
+                cap_array.append(row)
+            patterns_capacities_output[name] = cap_array
+        meta = {
+            "type": "meta",
+            "pattern_names": pattern_names,
+            "parts_count": len(specs),
+            "total_demand": _total_demand(demands),
+            "patterns_capacities": patterns_capacities_output,
+        }
+        return StreamingResponse(
+            _stream_pattern_sections(
+                meta,
+                list(pattern_capacities.keys()),
+                list(pattern_capacities.keys()),
+                optimize_args,
+                ["勤務体制", "ステータス", "目的関数値", "実行時間(秒)", "平均負荷率", "未割当合計"],
+                pattern_avg_caps,
+                {name: int(arr.sum()) for name, arr in pattern_caps_arr.items()},
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    # 各パターンで最適化を並列実行
+    pattern_results = await _run_solver_patterns(
+        list(pattern_capacities.keys()), optimize_args,
+    )
 
-    # === パターン比較サマリー ===
+    pattern_loads_arr = {
+        name: _monthly_matrix(result.line_loads) if result is not None else None
+        for name, result in pattern_results.items()
+    }
+    pattern_avg_loads = {
+        name: arr.mean(axis=1) if arr is not None else None
+        for name, arr in pattern_loads_arr.items()
+    }
+
+    # === パターン別出力の一括生成 ===
+    # サマリー・月別負荷・部品割当・未割当詳細・キャパシティを
+    # パターンごとの1パスで構築し、pattern_resultsの再参照と再集計を避ける
     summary_array = [["勤務体制", "ステータス", "目的関数値", "実行時間(秒)", "平均負荷率", "未割当合計"]]
+    all_unmet_parts = set()
+    patterns_line_loads = {}
+    patterns_allocations = {}
+    patterns_unmet = {}
+    patterns_capacities_output = {}
     for name in pattern_names:
-        result = pattern_results.get(name)
+        # キャパシティはソルバー結果の有無に関わらず返す
         capacities = pattern_capacities[name]
+        cap_array = [["ライン"] + MONTHS]
+        for line in DISC_LINES:
+            row = [line]
+            row.extend(capacities.get(line, _ZEROS12))
+            cap_array.append(row)
+        patterns_capacities_output[name] = cap_array
+
+        result = pattern_results.get(name)
         if result is None:
             summary_array.append([name, "ERROR", "", "", "", ""])
+            patterns_line_loads[name] = []
+            patterns_allocations[name] = []
+            patterns_unmet[name] = []
             continue
-        total_load = sum(sum(loads) for loads in result.line_loads.values())
-        total_cap = sum(sum(capacities.get(line, [0] * 12)) for line in DISC_LINES)
+
+        # サマリー行
+        total_load = int(pattern_loads_arr[name].sum())
+        total_cap = int(pattern_caps_arr[name].sum())
         avg_rate_val = total_load / total_cap if total_cap > 0 else 0
-        total_unmet = sum(sum(u) for u in result.unmet_demand.values()) if result.unmet_demand else 0
+        total_unmet = _total_unmet(result.unmet_demand)
         summary_array.append([
             name,
             result.status,
             result.objective_value,
             round(result.solve_time, 2),
-            f"{avg_rate_val:.1%}",
+            _format_pct(avg_rate_val),
             total_unmet,
         ])
 
+        # ライン別月別負荷・部品割当・未割当詳細
+        line_loads_array, alloc_array, unmet_array, unmet_parts = _emit_pattern_tables(
+            result, pattern_avg_caps[name], pattern_avg_loads[name]
+        )
+        patterns_line_loads[name] = line_loads_array
+        patterns_allocations[name] = alloc_array
+        patterns_unmet[name] = unmet_array
+        all_unmet_parts |= unmet_parts
+
     # === ライン別負荷率比較 ===
     line_comparison_header = ["ライン", "JPH"]
     for name in pattern_names:
         line_comparison_header.extend([f"平均能力({name})", f"平均負荷({name})", f"負荷率({name})"])
     line_comparison_array = [line_comparison_header]
 
-    for line in DISC_LINES:
+    for i, line in enumerate(DISC_LINES):
         row = [line, jph.get(line, 0)]
         for name in pattern_names:
-            capacities = pattern_capacities[name]
-            result = pattern_results.get(name)
-            line_caps = capacities.get(line, [0] * 12)
-            avg_cap = sum(line_caps) / 12
-            if result is None:
+            if pattern_avg_loads[name] is None:
                 row.extend(["", "", ""])
                 continue
-            loads = result.line_loads.get(line, [0] * 12)
-            avg_load = sum(loads) / 12
+            avg_cap = float(pattern_avg_caps[name][i])
+            avg_load = float(pattern_avg_loads[name][i])
             load_rate_val = avg_load / avg_cap if avg_cap > 0 else 0
-            row.extend([int(avg_cap), int(avg_load), f"{load_rate_val:.1%}"])
+            row.extend([int(avg_cap), int(avg_load), _format_pct(load_rate_val)])
         line_comparison_array.append(row)
 
-    # === パターン別ライン月別負荷 ===
-    patterns_line_loads = {}
-    for name in pattern_names:
-        capacities = pattern_capacities[name]
-        result = pattern_results.get(name)
-        if result is None:
-            patterns_line_loads[name] = []
-            continue
-
-        line_loads_array = [["ライン"] + MONTHS + ["平均能力", "平均負荷", "負荷率"]]
-        for line in DISC_LINES:
-            loads = result.line_loads.get(line, [0] * 12)
-            line_caps = capacities.get(line, [0] * 12)
-            avg_cap = sum(line_caps) / 12
-            avg_load = sum(loads) / 12
-            load_rate_val = avg_load / avg_cap if avg_cap > 0 else 0
-            line_loads_array.append(
-                [line] + loads + [int(avg_cap), int(avg_load), f"{load_rate_val:.1%}"]
-            )
-        patterns_line_loads[name] = line_loads_array
-
-    # === パターン別部品割当 ===
-    patterns_allocations = {}
-    for name in pattern_names:
-        result = pattern_results.get(name)
-        if result is None:
-            patterns_allocations[name] = []
-            continue
-        alloc_array = [["部品番号", "割当ライン"] + MONTHS + ["年間計"]]
-        for part_num in sorted(result.allocation.keys()):
-            for line, monthly in result.allocation[part_num].items():
-                if sum(monthly) > 0:
-                    alloc_array.append([part_num, line] + monthly + [sum(monthly)])
-        patterns_allocations[name] = alloc_array
-
-    # === パターン別未割当 ===
-    patterns_unmet = {}
-    for name in pattern_names:
-        result = pattern_results.get(name)
-        if result is None:
-            patterns_unmet[name] = []
-            continue
-        unmet_array = [["部品番号"] + MONTHS + ["年間計"]]
-        if result.unmet_demand:
-            for part_num in sorted(result.unmet_demand.keys()):
-                monthly_unmet = result.unmet_demand[part_num]
-                if sum(monthly_unmet) > 0:
-                    unmet_array.append([part_num] + monthly_unmet + [sum(monthly_unmet)])
-        patterns_unmet[name] = unmet_array
-
     # === 未割当比較 ===
     unmet_comparison_header = ["部品番号"]
     for name in pattern_names:
         unmet_comparison_header.append(f"未割当({name})")
     unmet_comparison_array = [unmet_comparison_header]
 
-    all_unmet_parts = set()
-    for result in pattern_results.values():
-        if result and result.unmet_demand:
-            for part_num, monthly in result.unmet_demand.items():
-                if sum(monthly) > 0:
-                    all_unmet_parts.add(part_num)
-
     for part_num in sorted(all_unmet_parts):
         row = [part_num]
         for name in pattern_names:
@@ -842,16 +1203,7 @@ def _run_work_pattern_comparison_impl(request: CompareByWorkPatternRequest):
                 row.append(0)
         unmet_comparison_array.append(row)
 
-    # === パターン別キャパシティ ===
-    patterns_capacities_output = {}
-    for name in pattern_names:
-        capacities = pattern_capacities[name]
-        cap_array = [["ライン"] + MONTHS]
-        for line in DISC_LINES:
-            cap_array.append([line] + capacities.get(line, [0] * 12))
-        patterns_capacities_output[name] = cap_array
-
-    total_demand = sum(sum(d.monthly_demand) for d in demands.values())
+    total_demand = _total_demand(demands)
 
     return {
         "success": any(
@@ -876,4 +1228,6 @@ def _run_work_pattern_comparison_impl(request: CompareByWorkPatternRequest):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    # libuvベースのイベントループとC実装のHTTPパーサで、
+    # 大きなJSON応答のソケット送出を高速化する（uvicorn[standard]で導入）
+    uvicorn.run(app, host="0.0.0.0", port=8080, loop="uvloop", http="httptools")
@@ -3,6 +3,7 @@ KIRIU ライン負荷最適化システム - 設定ファイル
 """
 
 from dataclasses import dataclass
+from functools import lru_cache
 
 # ディスクライン一覧
 DISC_LINES = ['4915', '4919', '4927', '4928', '4934', '4935', '4945', '4G01', '4J01']
@@ -35,7 +36,7 @@ DEFAULT_JPH = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkPattern:
     """勤務体制パターン"""
     name: str           # 例: "2直2交替"
@@ -53,17 +54,14 @@ DEFAULT_WORK_PATTERNS = [
 DEFAULT_MONTHLY_WORKING_DAYS = [20, 19, 21, 22, 21, 20, 22, 19, 21, 20, 18, 21]
 
 
-def evaluate_work_formula(formula: str, days: float, exclusion: float) -> float:
+@lru_cache(maxsize=64)
+def _compile_formula(formula: str):
     """
-    勤務体制の月稼働時間数式を安全に評価する。
-
-    Args:
-        formula: 数式文字列（例: "{月間稼働日数} * 7.5 * 2 - {月除外時間}"）
-        days: 月間稼働日数
-        exclusion: 月除外時間
+    勤務体制の数式を正規化・検証してコードオブジェクトにコンパイルする。
 
-    Returns:
-        月稼働時間
+    同じ数式が（ライン×月の回数だけ）繰り返し評価されるため、
+    正規化とcompileの結果をlru_cacheで再利用する。
+    プレースホルダは変数 d（月間稼働日数）/ e（月除外時間）に置換する。
     """
     # 全角記号・スペースを半角に正規化
     normalized = formula
@@ -75,15 +73,31 @@ def evaluate_work_formula(formula: str, days: float, exclusion: float) -> float:
     normalized = normalized.replace('）', ')')
     normalized = normalized.replace('\u3000', ' ')  # 全角スペース
 
-    expr = normalized.replace('{月間稼働日数}', str(float(days)))
-    expr = expr.replace('{月除外時間}', str(float(exclusion)))
+    expr = normalized.replace('{月間稼働日数}', 'd')
+    expr = expr.replace('{月除外時間}', 'e')
 
-    # 安全な評価: 数字、演算子、空白、小数点のみ許可
-    allowed = set('0123456789.+-*/ ()')
+    # 安全な評価: 数字、演算子、空白、小数点、変数d/eのみ許可
+    allowed = set('0123456789.+-*/ ()de')
     if not all(c in allowed for c in expr):
         raise ValueError(f'数式に不正な文字が含まれています: {formula}')
 
-    return float(eval(expr))
+    return compile(expr, '<work_formula>', 'eval')
+
+
+def evaluate_work_formula(formula: str, days: float, exclusion: float) -> float:
+    """
+    勤務体制の月稼働時間数式を安全に評価する。
+
+    Args:
+        formula: 数式文字列（例: "{月間稼働日数} * 7.5 * 2 - {月除外時間}"）
+        days: 月間稼働日数
+        exclusion: 月除外時間
+
+    Returns:
+        月稼働時間
+    """
+    code = _compile_formula(formula)
+    return float(eval(code, {'__builtins__': {}}, {'d': float(days), 'e': float(exclusion)}))
 
 
 def calculate_monthly_capacities(
@@ -104,16 +118,19 @@ def calculate_monthly_capacities(
     """
     result = {}
     for pattern in patterns:
+        # 月稼働時間はラインに依存しないため、パターンごとに1回だけ計算する
+        monthly_hours = [
+            evaluate_work_formula(
+                pattern.formula,
+                monthly_working_days[month_idx] if month_idx < len(monthly_working_days) else 20,
+                pattern.exclusion_hours,
+            )
+            for month_idx in range(12)
+        ]
         caps = {}
         for line in DISC_LINES:
             line_jph = jph.get(line, DEFAULT_JPH.get(line, 0))
-            monthly = []
-            for month_idx in range(12):
-                days = monthly_working_days[month_idx] if month_idx < len(monthly_working_days) else 20
-                hours = evaluate_work_formula(pattern.formula, days, pattern.exclusion_hours)
-                capacity = int(line_jph * hours)
-                monthly.append(max(0, capacity))
-            caps[line] = monthly
+            caps[line] = [max(0, int(line_jph * hours)) for hours in monthly_hours]
         result[pattern.name] = caps
     return result
 
@@ -4,13 +4,29 @@ KIRIU ライン負荷最適化システム - データ読み込みモジュー
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 
+import numpy as np
 import pandas as pd
 
 from config import DISC_LINES, SPEC_FILE, PLAN_FILE, PLAN_SHEET
 
-
-@dataclass
+# 正規化用の変換テーブル・正規表現・ライン集合
+# セルごとの呼び出しで毎回構築しないよう、モジュールレベルで1度だけ用意する
+_PART_TRANS = str.maketrans(
+    'ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚ０１２３４５６７８９',
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+)
+_LINE_TRANS = str.maketrans(
+    '０１２３４５６７８９ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ',
+    '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+_PART_STRIP = re.compile(r'[-\s]')
+_LINE_KEEP = re.compile(r'[^0-9A-Z]')
+_DISC_SET = frozenset(DISC_LINES)
+
+
+@dataclass(slots=True)
 class PartSpec:
     """部品仕様情報"""
     part_number: str          # 部品番号（正規化済み）
@@ -20,7 +36,7 @@ class PartSpec:
     sub2_line: str | None     # サブ2ライン
 
 
-@dataclass
+@dataclass(slots=True)
 class PartDemand:
     """部品需要情報"""
     part_number: str          # 部品番号（正規化済み）
@@ -28,49 +44,76 @@ class PartDemand:
     monthly_demand: list[int] # 月別需要（4月〜3月の12ヶ月）
 
 
+@lru_cache(maxsize=4096)
 def normalize_part_number(part_num: str) -> str:
-    """部品番号を正規化（ハイフン除去、空白除去、全角→半角）"""
+    """部品番号を正規化（ハイフン除去、空白除去、全角→半角）
+
+    大きな計画ファイルでは同じ部品番号が繰り返し現れるため、
+    正規化結果をlru_cacheで再利用する。
+    """
     if pd.isna(part_num):
         return ''
     s = str(part_num).strip()
     # 全角英数を半角に
-    s = s.translate(str.maketrans(
-        'ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚ０１２３４５６７８９',
-        'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
-    ))
-    return re.sub(r'[-\s]', '', s).upper()
+    s = s.translate(_PART_TRANS)
+    return _PART_STRIP.sub('', s).upper()
 
 
-def normalize_line_name(line_name: str) -> str | None:
-    """ライン名を正規化"""
-    if pd.isna(line_name):
-        return None
-    s = str(line_name).strip()
+@lru_cache(maxsize=2048)
+def _normalize_line_name_cached(raw: str) -> str | None:
+    """ライン名正規化の本体（文字列化済みの値をキーにキャッシュ）"""
+    s = raw.strip()
     # 全角を半角に
-    s = s.translate(str.maketrans(
-        '０１２３４５６７８９ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ',
-        '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-    ))
+    s = s.translate(_LINE_TRANS)
     # 数字とアルファベットのみ抽出
-    s = re.sub(r'[^0-9A-Z]', '', s.upper())
+    s = _LINE_KEEP.sub('', s.upper())
     # 先頭のMを除去（Ｍ4927 → 4927）
     if s.startswith('M') and len(s) > 1:
         s = s[1:]
     # 末尾の.0を除去（4935.0 → 4935）
-    if s.endswith('0') and '.' in str(line_name):
+    if s.endswith('0') and '.' in raw:
         # 元の値に小数点があった場合
         pass
     # ライン名として有効か確認
-    if s in DISC_LINES:
+    if s in _DISC_SET:
         return s
     # 数値のみの場合、前に4を付けてチェック
     if s.isdigit() and len(s) == 3:
         candidate = '4' + s
-        if candidate in DISC_LINES:
+        if candidate in _DISC_SET:
             return candidate
     return s if s else None
 
 
+def normalize_line_name(line_name: str) -> str | None:
+    """ライン名を正規化
+
+    ライン名セルの表記ゆれは種類が少なく同じ値が何度も現れるため、
+    欠損チェックだけ行い、正規化本体はキャッシュ付きの内部関数に任せる。
+    """
+    if pd.isna(line_name):
+        return None
+    return _normalize_line_name_cached(str(line_name))
+
+
+def _read_excel(filepath: str, **kwargs) -> pd.DataFrame:
+    """Excelファイルを読み込む（python-calamineがあればRust実装エンジンを使用）
+
+    calamineはopenpyxlより大きなブックの読み込みが大幅に速い。
+    未インストール環境では従来どおりデフォルトエンジンで読む。
+    """
+    try:
+        return pd.read_excel(filepath, engine='calamine', **kwargs)
+    except ImportError:
+        return pd.read_excel(filepath, **kwargs)
+
+
+def _normalize_line_column(series: pd.Series) -> pd.Series:
+    """ライン列を正規化（ユニーク値のみ変換して全行へマップ）"""
+    mapping = {v: normalize_line_name(v) for v in series.dropna().unique()}
+    return series.map(mapping)
+
+
 def load_equipment_spec(filepath: str = SPEC_FILE) -> dict[str, PartSpec]:
     """
     設備仕様ファイルから部品仕様を読み込む
@@ -86,42 +129,56 @@ def load_equipment_spec(filepath: str = SPEC_FILE) -> dict[str, PartSpec]:
     """
     print(f"設備仕様ファイル読み込み: {filepath}")
 
-    df = pd.read_excel(filepath, sheet_name=0, header=None)
+    df = _read_excel(filepath, sheet_name=0, header=None)
 
     parts = {}
 
-    for idx, row in df.iterrows():
-        # 行8以降がデータ行（ライン仕様行はスキップ）
-        if idx < 8:
-            continue
-
-        # 列1: メインライン
-        main_raw = row.iloc[1] if len(row) > 1 else None
-        # 列2: サブ1ライン
-        sub1_raw = row.iloc[2] if len(row) > 2 else None
-        # 列3: サブ2ライン
-        sub2_raw = row.iloc[3] if len(row) > 3 else None
-        # 列6: 部品番号
-        part_raw = row.iloc[6] if len(row) > 6 else None
-
-        part_num = normalize_part_number(part_raw)
-        if not part_num:
-            continue
-
-        # 「ライン仕様」や「加工ﾗｲﾝ計」などの行をスキップ
-        if 'ライン' in str(main_raw) or '仕様' in str(main_raw) or '計' in part_num:
-            continue
-
-        main_line = normalize_line_name(main_raw)
-        sub1_line = normalize_line_name(sub1_raw)
-        sub2_line = normalize_line_name(sub2_raw)
-
+    # 行8以降がデータ行（ライン仕様行はスキップ）
+    data = df.iloc[8:]
+    n_cols = data.shape[1]
+
+    def column(col_idx: int) -> pd.Series:
+        """列をSeriesで取得（存在しない列は空文字）"""
+        if col_idx < n_cols:
+            return data.iloc[:, col_idx]
+        return pd.Series('', index=data.index)
+
+    # 列1-3: メイン/サブ1/サブ2ライン、列6: 部品番号
+    main_raw = column(1)
+    sub1_raw = column(2)
+    sub2_raw = column(3)
+    part_raw = column(6)
+
+    # 部品番号の正規化はiterrows＋セル単位呼び出しではなく、
+    # pandasのstrメソッド（C実装）で列ごと一括処理する
+    part_nums = (
+        part_raw.fillna('').astype(str).str.strip()
+        .str.translate(_PART_TRANS)
+        .str.replace(r'[-\s]', '', regex=True)
+        .str.upper()
+    )
+
+    # 「ライン仕様」や「加工ﾗｲﾝ計」などの行を一括で除外
+    main_str = main_raw.fillna('').astype(str)
+    valid = (
+        part_nums.ne('')
+        & ~part_nums.str.contains('計', regex=False)
+        & ~main_str.str.contains('ライン|仕様', regex=True)
+    )
+
+    main_lines = _normalize_line_column(main_raw)
+    sub1_lines = _normalize_line_column(sub1_raw)
+    sub2_lines = _normalize_line_column(sub2_raw)
+
+    for part_num, main_line, sub1_line, sub2_line in zip(
+        part_nums[valid], main_lines[valid], sub1_lines[valid], sub2_lines[valid]
+    ):
         # メインラインが有効なディスクラインの場合のみ登録
-        if main_line and main_line in DISC_LINES:
+        if main_line and main_line in _DISC_SET:
             # サブラインもディスクラインのもののみ
-            if sub1_line and sub1_line not in DISC_LINES:
+            if sub1_line not in _DISC_SET:
                 sub1_line = None
-            if sub2_line and sub2_line not in DISC_LINES:
+            if sub2_line not in _DISC_SET:
                 sub2_line = None
 
             parts[part_num] = PartSpec(
@@ -147,7 +204,7 @@ def load_equipment_spec(filepath: str = SPEC_FILE) -> dict[str, PartSpec]:
     return parts
 
 
-@dataclass
+@dataclass(slots=True)
 class PartPlanInfo:
     """生産計画から取得した部品情報（仕様補完用）"""
     part_number: str
@@ -179,7 +236,7 @@ def load_production_plan(
     print(f"生産計画ファイル読み込み: {filepath}")
     print(f"  シート: {sheet_name}")
 
-    df = pd.read_excel(filepath, sheet_name=sheet_name, header=None)
+    df = _read_excel(filepath, sheet_name=sheet_name, header=None)
 
     # ヘッダー行（行17, 0-indexed）を確認
     header_row = 17
@@ -238,53 +295,80 @@ def load_production_plan(
     print(f"  部品番号列: {part_col}")
     print(f"  ライン列: メイン={main_line_col}, サブ1={sub1_line_col}, サブ2={sub2_line_col}")
 
-    demands = {}
     plan_infos = {}  # 生産計画から取得したライン情報
-    disc_keywords = ['ディスク', 'ﾃﾞｨｽｸ', '5:ディスク', '5：ディスク', '5:ﾃﾞｨｽｸ']
+
+    # 需要の合算はndarrayへの一括加算で行う: {part_num: 月別需要(int64, 12)}
+    demand_acc: dict[str, np.ndarray] = {}
+    demand_names: dict[str, str] = {}
 
     # 合算トラッキング: {part_num: [(main_line, row_index), ...]}
     row_tracking = {}
 
-    for idx, row in df.iterrows():
-        if idx <= header_row:
-            continue
-
-        # 分類名でフィルタ（ディスクのみ）
-        category = str(row.iloc[category_col]) if pd.notna(row.iloc[category_col]) else ''
-        is_disc = any(kw in category for kw in disc_keywords) or category.startswith('5:') or category == '5'
-
-        if not is_disc:
-            continue
-
-        # ライン情報を取得
-        main_line_raw = row.iloc[main_line_col] if pd.notna(row.iloc[main_line_col]) else ''
-        main_line = normalize_line_name(main_line_raw)
-
-        # メインラインがディスクラインかチェック
-        if main_line not in DISC_LINES:
-            continue
-
-        # サブライン情報も取得
-        sub1_line_raw = row.iloc[sub1_line_col] if sub1_line_col < len(row) and pd.notna(row.iloc[sub1_line_col]) else ''
-        sub2_line_raw = row.iloc[sub2_line_col] if sub2_line_col < len(row) and pd.notna(row.iloc[sub2_line_col]) else ''
-        sub1_line = normalize_line_name(sub1_line_raw)
-        sub2_line = normalize_line_name(sub2_line_raw)
+    # データ行を一括で切り出し、フィルタと正規化を列単位で行う
+    # （iterrows＋セル単位のpd.isna/str変換は行数に比例して遅いため）
+    data = df.iloc[header_row + 1:]
+    n_cols = df.shape[1]
+
+    def column(col_idx: int) -> pd.Series:
+        """列をSeriesで取得（存在しない列は欠損扱い）"""
+        if col_idx < n_cols:
+            return data.iloc[:, col_idx]
+        return pd.Series(np.nan, index=data.index)
+
+    # 分類名でフィルタ（ディスクのみ）
+    category = column(category_col).fillna('').astype(str)
+    is_disc = (
+        category.str.contains('ディスク|ﾃﾞｨｽｸ', regex=True)
+        | category.str.startswith('5:')
+        | category.eq('5')
+    )
+
+    # ライン列はユニーク値のみ正規化して全行へマップ
+    main_lines = _normalize_line_column(column(main_line_col))
+    sub1_lines = _normalize_line_column(column(sub1_line_col))
+    sub2_lines = _normalize_line_column(column(sub2_line_col))
+
+    # 部品番号を一括正規化（「計」行は元の表記で除外）
+    part_raw = column(part_col).fillna('').astype(str)
+    part_nums = (
+        part_raw.str.strip()
+        .str.translate(_PART_TRANS)
+        .str.replace(r'[-\s]', '', regex=True)
+        .str.upper()
+    )
+
+    valid = (
+        is_disc
+        & main_lines.isin(_DISC_SET)
+        & part_nums.ne('')
+        & ~part_raw.str.contains('計', regex=False)
+    )
+
+    # 月別需要を(行, 12)のint64行列として一括変換（非数値・欠損・負値は0）
+    monthly_mat = np.zeros((len(data), 12), dtype=np.int64)
+    for i, col_idx in enumerate(month_cols):
+        if col_idx < n_cols:
+            vals = pd.to_numeric(data.iloc[:, col_idx], errors='coerce').fillna(0)
+            monthly_mat[:, i] = vals.astype(np.int64).clip(lower=0)
+    row_totals = monthly_mat.sum(axis=1)
+
+    part_names = column(name_col)
+
+    for pos in np.flatnonzero(valid.to_numpy()):
+        part_num = part_nums.iloc[pos]
+        main_line = main_lines.iloc[pos]
 
         # サブラインがディスクラインでない場合はNone
-        if sub1_line and sub1_line not in DISC_LINES:
+        sub1_line = sub1_lines.iloc[pos]
+        sub2_line = sub2_lines.iloc[pos]
+        if sub1_line not in _DISC_SET:
             sub1_line = None
-        if sub2_line and sub2_line not in DISC_LINES:
+        if sub2_line not in _DISC_SET:
             sub2_line = None
 
-        # 部品番号
-        part_raw = row.iloc[part_col] if pd.notna(row.iloc[part_col]) else ''
-        part_num = normalize_part_number(part_raw)
-
-        if not part_num or '計' in str(part_raw):
-            continue
-
         # 部品名
-        part_name = str(row.iloc[name_col]) if pd.notna(row.iloc[name_col]) else ''
+        name_val = part_names.iloc[pos]
+        part_name = str(name_val) if pd.notna(name_val) else ''
 
         # ライン情報を保存（最初に見つかったものを使用）
         if part_num not in plan_infos:
@@ -296,36 +380,30 @@ def load_production_plan(
                 sub2_line=sub2_line,
             )
 
-        # 月別需要を取得
-        monthly = []
-        for col_idx in month_cols:
-            val = row.iloc[col_idx] if col_idx < len(row) else 0
-            if pd.isna(val):
-                val = 0
-            try:
-                val = int(float(val))
-            except (ValueError, TypeError):
-                val = 0
-            monthly.append(max(0, val))
-
         # 需要がゼロでない場合のみ追加
-        if sum(monthly) > 0:
+        if row_totals[pos] > 0:
             # 行トラッキング
             if part_num not in row_tracking:
                 row_tracking[part_num] = []
-            row_tracking[part_num].append((main_line, idx + 1))  # 1-indexed row number
+            row_tracking[part_num].append((main_line, data.index[pos] + 1))  # 1-indexed row number
 
             # 同一部品番号が複数行ある場合は需要を合算（一行にまとめる）
-            if part_num in demands:
-                existing = demands[part_num]
-                for i in range(12):
-                    existing.monthly_demand[i] += monthly[i]
+            acc = demand_acc.get(part_num)
+            if acc is not None:
+                acc += monthly_mat[pos]
             else:
-                demands[part_num] = PartDemand(
-                    part_number=part_num,
-                    part_name=part_name,
-                    monthly_demand=monthly,
-                )
+                demand_acc[part_num] = monthly_mat[pos].copy()
+                demand_names[part_num] = part_name
+
+    # 合算済みの需要をPartDemandへ変換（ネイティブintのリストに戻す）
+    demands = {
+        part_num: PartDemand(
+            part_number=part_num,
+            part_name=demand_names[part_num],
+            monthly_demand=acc.tolist(),
+        )
+        for part_num, acc in demand_acc.items()
+    }
 
     # 合算された部品を表示
     consolidated = {pn: entries for pn, entries in row_tracking.items() if len(entries) > 1}
@@ -339,7 +417,7 @@ def load_production_plan(
             print(f"    {pn} (ライン: {line_str}): {len(entries)}行(行{row_nums}) → 合算後年間需要 {total:,}")
 
     print(f"  読み込み部品数: {len(demands)}")
-    total_demand = sum(sum(d.monthly_demand) for d in demands.values())
+    total_demand = int(sum(acc.sum() for acc in demand_acc.values()))
     print(f"  年間総需要: {total_demand:,}")
 
     return demands, plan_infos
@@ -363,8 +441,8 @@ def merge_data(
     """
     print("\nデータマージ処理:")
 
-    # 需要があるが仕様がない部品
-    demand_only = set(demands.keys()) - set(specs.keys())
+    # 需要があるが仕様がない部品（dictキービューの集合演算で中間setを作らない）
+    demand_only = demands.keys() - specs.keys()
 
     # 生産計画のライン情報から仕様を自動補完
     auto_generated = 0
@@ -386,7 +464,7 @@ def merge_data(
         print(f"  生産計画から仕様を自動補完: {auto_generated}件")
 
     # 補完後に再計算
-    demand_only = set(demands.keys()) - set(specs.keys())
+    demand_only = demands.keys() - specs.keys()
     if demand_only:
         print(f"  警告: 需要はあるが仕様がない部品: {len(demand_only)}件")
         for pn in sorted(list(demand_only))[:10]:
@@ -395,16 +473,16 @@ def merge_data(
             print(f"    ... 他{len(demand_only) - 10}件")
 
     # 仕様はあるが需要がない部品
-    spec_only = set(specs.keys()) - set(demands.keys())
+    spec_only = specs.keys() - demands.keys()
     if spec_only:
         print(f"  情報: 仕様はあるが需要がない部品: {len(spec_only)}件")
 
     # 両方あるものだけ使用
-    common = set(specs.keys()) & set(demands.keys())
+    common = specs.keys() & demands.keys()
     print(f"  マッチした部品数: {len(common)}")
 
-    filtered_specs = {k: v for k, v in specs.items() if k in common}
-    filtered_demands = {k: v for k, v in demands.items() if k in common}
+    filtered_specs = {k: specs[k] for k in common}
+    filtered_demands = {k: demands[k] for k in common}
 
     return filtered_specs, filtered_demands
 
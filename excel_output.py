@@ -2,46 +2,71 @@
 KIRIU ライン負荷最適化システム - Excel出力モジュール
 """
 
+import io
 from pathlib import Path
 
+import numpy as np
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 
 from config import DISC_LINES, DEFAULT_CAPACITIES, MONTHS, OUTPUT_DIR
 from model import OptimizationResult
 from data_loader import PartSpec
 
+# セルごとにfont/fill/border/number_formatを個別代入するとopenpyxlが
+# 都度スタイル配列を組み直すため、名前付きスタイルを1度登録して
+# cell.style = 'kr_*' の1代入で済ませる
+# 列番号→列名はエクスポートごとに再計算せず、使う範囲を1度だけ引いておく
+_COL_LETTERS = tuple(get_column_letter(i) for i in range(1, 64))
+
+_THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+_NAMED_STYLES = [
+    NamedStyle(
+        name='kr_header',
+        font=Font(bold=True, size=11, color='FFFFFF'),
+        fill=PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid'),
+        border=_THIN_BORDER,
+        alignment=Alignment(horizontal='center'),
+    ),
+    NamedStyle(name='kr_cell', font=Font(size=11), border=_THIN_BORDER),
+    NamedStyle(name='kr_num', font=Font(size=11), border=_THIN_BORDER, number_format='#,##0'),
+    NamedStyle(name='kr_pct', font=Font(size=11), border=_THIN_BORDER, number_format='0.0%'),
+    NamedStyle(name='kr_cell_bold', font=Font(bold=True), border=_THIN_BORDER),
+    NamedStyle(name='kr_num_bold', font=Font(bold=True), border=_THIN_BORDER, number_format='#,##0'),
+]
+
+
+# 条件付きで上書きする塗り・フォント（ループ内で都度生成しない）
+_SUBHEADER_FILL = PatternFill(start_color='D9E2F3', end_color='D9E2F3', fill_type='solid')
+_WARNING_FILL = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
+_SUB_LINE_FILL = PatternFill(start_color='FFEB9C', end_color='FFEB9C', fill_type='solid')
+_TITLE_FONT = Font(bold=True, size=14)
+_SECTION_FONT = Font(bold=True, size=12)
+
+
+def register_named_styles(wb: Workbook):
+    """名前付きスタイルをワークブックへ登録（ワークブックごとに1回）"""
+    for style in _NAMED_STYLES:
+        if style.name not in wb.named_styles:
+            wb.add_named_style(style)
 
-def create_styles():
-    """共通スタイルを定義"""
-    header_font = Font(bold=True, size=11)
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_font_white = Font(bold=True, size=11, color='FFFFFF')
-
-    subheader_fill = PatternFill(start_color='D9E2F3', end_color='D9E2F3', fill_type='solid')
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
 
-    number_format = '#,##0'
-    percent_format = '0.0%'
-
-    warning_fill = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
+def create_styles():
+    """共通スタイルを定義（名前付きスタイルにできない条件付き塗りなど）
 
+    毎回新しいFill/Fontを作るとopenpyxlのスタイルテーブルで別IDとして
+    重複排除し直されるため、モジュール定数の同一インスタンスを返す。
+    """
     return {
-        'header_font': header_font,
-        'header_fill': header_fill,
-        'header_font_white': header_font_white,
-        'subheader_fill': subheader_fill,
-        'thin_border': thin_border,
-        'number_format': number_format,
-        'percent_format': percent_format,
-        'warning_fill': warning_fill,
+        'subheader_fill': _SUBHEADER_FILL,
+        'warning_fill': _WARNING_FILL,
     }
 
 
@@ -55,7 +80,6 @@ def _get_monthly_capacity(capacities: dict[str, int | list[int]], line: str, mon
 
 def _normalize_capacities(capacities: dict[str, int | list[int]]) -> dict[str, list[int]]:
     """能力を月別形式に正規化"""
-    from config import DISC_LINES, DEFAULT_CAPACITIES
     result = {}
     for line in DISC_LINES:
         cap = capacities.get(line, DEFAULT_CAPACITIES.get(line, 0))
@@ -66,18 +90,24 @@ def _normalize_capacities(capacities: dict[str, int | list[int]]) -> dict[str, l
     return result
 
 
-def create_summary_sheet(wb: Workbook, result: OptimizationResult, capacities: dict[str, int | list[int]], pattern_label: str = ''):
+def _line_matrices(monthly_caps: dict[str, list[int]], line_loads: dict[str, list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    """ライン×12ヶ月の能力・負荷行列を作る（年間計・平均は行方向の一括集計で出す）"""
+    caps_mat = np.array([monthly_caps.get(line, [0] * 12) for line in DISC_LINES], dtype=np.int64)
+    loads_mat = np.array([line_loads.get(line, [0] * 12) for line in DISC_LINES], dtype=np.int64)
+    return caps_mat, loads_mat
+
+
+def create_summary_sheet(wb: Workbook, result: OptimizationResult, monthly_caps: dict[str, list[int]], styles: dict, pattern_label: str = ''):
     """サマリーシートを作成"""
     ws = wb.active
     ws.title = 'サマリー'
-    styles = create_styles()
 
     # タイトル
     title = 'KIRIU ライン負荷最適化結果'
     if pattern_label:
         title += f' ({pattern_label})'
     ws['A1'] = title
-    ws['A1'].font = Font(bold=True, size=14)
+    ws['A1'].font = _TITLE_FONT
     ws.merge_cells('A1:F1')
 
     # 基本情報
@@ -91,8 +121,7 @@ def create_summary_sheet(wb: Workbook, result: OptimizationResult, capacities: d
     # 未割当サマリー
     total_unmet = 0
     if result.unmet_demand:
-        for monthly in result.unmet_demand.values():
-            total_unmet += sum(monthly)
+        total_unmet = int(np.array(list(result.unmet_demand.values()), dtype=np.int64).sum())
     ws['A6'] = '未割当数量合計'
     ws['B6'] = total_unmet
     ws['B6'].number_format = '#,##0'
@@ -101,45 +130,38 @@ def create_summary_sheet(wb: Workbook, result: OptimizationResult, capacities: d
 
     # ライン別負荷サマリー（行9から）
     ws['A9'] = 'ライン別負荷サマリー'
-    ws['A9'].font = Font(bold=True, size=12)
+    ws['A9'].font = _SECTION_FONT
 
     headers = ['ライン', '平均能力', '平均負荷', '負荷率', '最大負荷', '最大月']
     for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=10, column=col, value=header)
-        cell.font = styles['header_font_white']
-        cell.fill = styles['header_fill']
-        cell.border = styles['thin_border']
-        cell.alignment = Alignment(horizontal='center')
+        ws.cell(row=10, column=col, value=header).style = 'kr_header'
 
-    # 月別能力を正規化
-    monthly_caps = _normalize_capacities(capacities)
+    # ライン別の平均・最大を行列で一括計算
+    caps_mat, loads_mat = _line_matrices(monthly_caps, result.line_loads)
+    avg_caps = caps_mat.mean(axis=1)
+    avg_loads = loads_mat.mean(axis=1)
+    max_loads = loads_mat.max(axis=1)
+    max_month_idxs = loads_mat.argmax(axis=1)
 
     row = 11
-    for line in DISC_LINES:
-        loads = result.line_loads.get(line, [0] * 12)
-        line_caps = monthly_caps.get(line, [0] * 12)
-        avg_cap = sum(line_caps) / 12
-        avg_load = sum(loads) / 12
+    for i, line in enumerate(DISC_LINES):
+        avg_cap = float(avg_caps[i])
+        avg_load = float(avg_loads[i])
         avg_rate = avg_load / avg_cap if avg_cap > 0 else 0
-        max_load = max(loads)
-        max_month_idx = loads.index(max_load) if loads else 0
-        max_month = MONTHS[max_month_idx]
+        max_load = int(max_loads[i])
+        max_month = MONTHS[int(max_month_idxs[i])]
 
-        ws.cell(row=row, column=1, value=line).border = styles['thin_border']
-        ws.cell(row=row, column=2, value=int(avg_cap)).border = styles['thin_border']
-        ws.cell(row=row, column=2).number_format = styles['number_format']
-        ws.cell(row=row, column=3, value=int(avg_load)).border = styles['thin_border']
-        ws.cell(row=row, column=3).number_format = styles['number_format']
+        ws.cell(row=row, column=1, value=line).style = 'kr_cell'
+        ws.cell(row=row, column=2, value=int(avg_cap)).style = 'kr_num'
+        ws.cell(row=row, column=3, value=int(avg_load)).style = 'kr_num'
 
         rate_cell = ws.cell(row=row, column=4, value=avg_rate)
-        rate_cell.border = styles['thin_border']
-        rate_cell.number_format = styles['percent_format']
+        rate_cell.style = 'kr_pct'
         if avg_rate > 1.0:
             rate_cell.fill = styles['warning_fill']
 
-        ws.cell(row=row, column=5, value=max_load).border = styles['thin_border']
-        ws.cell(row=row, column=5).number_format = styles['number_format']
-        ws.cell(row=row, column=6, value=max_month).border = styles['thin_border']
+        ws.cell(row=row, column=5, value=max_load).style = 'kr_num'
+        ws.cell(row=row, column=6, value=max_month).style = 'kr_cell'
 
         row += 1
 
@@ -152,139 +174,113 @@ def create_summary_sheet(wb: Workbook, result: OptimizationResult, capacities: d
     ws.column_dimensions['F'].width = 10
 
 
-def create_line_capacity_sheet(wb: Workbook, result: OptimizationResult, capacities: dict[str, int | list[int]]):
+def create_line_capacity_sheet(wb: Workbook, result: OptimizationResult, monthly_caps: dict[str, list[int]], styles: dict):
     """ライン別月別キャパシティ・負荷シートを作成"""
     ws = wb.create_sheet('ライン別負荷')
-    styles = create_styles()
 
-    # 月別能力を正規化
-    monthly_caps = _normalize_capacities(capacities)
+    # 年間計・平均を行列で一括計算
+    caps_mat, loads_mat = _line_matrices(monthly_caps, result.line_loads)
+    annual_caps = caps_mat.sum(axis=1)
+    annual_loads = loads_mat.sum(axis=1)
+    # 能力超過の判定はPythonの比較を月×ラインで繰り返さず、行列で一括計算する
+    # （負荷率>100%は「能力>0かつ超過」と同値）
+    over_mat = loads_mat > caps_mat
+    rate_over_mat = over_mat & (caps_mat > 0)
 
-    # ヘッダー行
-    ws['A1'] = 'ライン'
-    ws['B1'] = '項目'
-    for col, month in enumerate(MONTHS, start=3):
-        ws.cell(row=1, column=col, value=month)
-    ws.cell(row=1, column=15, value='年間計')
-    ws.cell(row=1, column=16, value='平均')
-
-    # ヘッダースタイル
-    for col in range(1, 17):
-        cell = ws.cell(row=1, column=col)
-        cell.font = styles['header_font_white']
-        cell.fill = styles['header_fill']
-        cell.border = styles['thin_border']
-        cell.alignment = Alignment(horizontal='center')
-
-    row = 2
-    for line in DISC_LINES:
+    # ヘッダー行（セル単位のws.cell呼び出しではなく行単位でappendする）
+    ws.append(['ライン', '項目'] + MONTHS + ['年間計', '平均'])
+    for cell in ws[1]:
+        cell.style = 'kr_header'
+
+    num_row_styles = ['kr_cell', 'kr_cell'] + ['kr_num'] * 14
+    rate_row_styles = ['kr_cell', 'kr_cell'] + ['kr_pct'] * 12 + ['kr_cell', 'kr_pct']
+
+    for i, line in enumerate(DISC_LINES):
         line_caps = monthly_caps.get(line, [0] * 12)
         loads = result.line_loads.get(line, [0] * 12)
+        annual_cap = int(annual_caps[i])
+        annual_load = int(annual_loads[i])
 
         # キャパシティ行（月別表示）
-        ws.cell(row=row, column=1, value=line).border = styles['thin_border']
-        ws.cell(row=row, column=2, value='キャパシティ').border = styles['thin_border']
-        ws.cell(row=row, column=2).fill = styles['subheader_fill']
-        for col, month_cap in enumerate(line_caps, start=3):
-            cell = ws.cell(row=row, column=col, value=month_cap)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['number_format']
-        ws.cell(row=row, column=15, value=sum(line_caps)).border = styles['thin_border']
-        ws.cell(row=row, column=15).number_format = styles['number_format']
-        ws.cell(row=row, column=16, value=int(sum(line_caps)/12)).border = styles['thin_border']
-        ws.cell(row=row, column=16).number_format = styles['number_format']
-        row += 1
+        ws.append([line, 'キャパシティ'] + line_caps
+                  + [annual_cap, annual_cap // 12])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, num_row_styles):
+            cell.style = style
+        cells[1].fill = styles['subheader_fill']
 
         # 負荷（生産数）行
-        ws.cell(row=row, column=1, value='').border = styles['thin_border']
-        ws.cell(row=row, column=2, value='生産数').border = styles['thin_border']
-        for col, (load, cap) in enumerate(zip(loads, line_caps), start=3):
-            cell = ws.cell(row=row, column=col, value=load)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['number_format']
-            if load > cap:
+        ws.append(['', '生産数'] + loads + [annual_load, annual_load // 12])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, num_row_styles):
+            cell.style = style
+        for cell, flag in zip(cells[2:14], over_mat[i].tolist()):
+            if flag:
                 cell.fill = styles['warning_fill']
-        ws.cell(row=row, column=15, value=sum(loads)).border = styles['thin_border']
-        ws.cell(row=row, column=15).number_format = styles['number_format']
-        ws.cell(row=row, column=16, value=int(sum(loads)/12)).border = styles['thin_border']
-        ws.cell(row=row, column=16).number_format = styles['number_format']
-        row += 1
 
         # 負荷率行（月別能力で計算）
-        ws.cell(row=row, column=1, value='').border = styles['thin_border']
-        ws.cell(row=row, column=2, value='負荷率').border = styles['thin_border']
-        for col, (load, cap) in enumerate(zip(loads, line_caps), start=3):
-            rate = load / cap if cap > 0 else 0
-            cell = ws.cell(row=row, column=col, value=rate)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['percent_format']
-            if rate > 1.0:
+        rates = [load / cap if cap > 0 else 0 for load, cap in zip(loads, line_caps)]
+        avg_rate = annual_load / annual_cap if annual_cap > 0 else 0
+        ws.append(['', '負荷率'] + rates + ['', avg_rate])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, rate_row_styles):
+            cell.style = style
+        for cell, flag in zip(cells[2:14], rate_over_mat[i].tolist()):
+            if flag:
                 cell.fill = styles['warning_fill']
-        total_cap = sum(line_caps)
-        avg_rate = sum(loads) / total_cap if total_cap > 0 else 0
-        ws.cell(row=row, column=15, value='').border = styles['thin_border']
-        ws.cell(row=row, column=16, value=avg_rate).border = styles['thin_border']
-        ws.cell(row=row, column=16).number_format = styles['percent_format']
-        row += 1
 
         # 空行
-        row += 1
+        ws.append([])
 
     # 列幅調整
     ws.column_dimensions['A'].width = 8
     ws.column_dimensions['B'].width = 14
     for col in range(3, 17):
-        ws.column_dimensions[get_column_letter(col)].width = 10
+        ws.column_dimensions[_COL_LETTERS[col - 1]].width = 10
 
 
 def create_part_allocation_sheet(
     wb: Workbook,
     result: OptimizationResult,
     specs: dict[str, PartSpec],
+    styles: dict,
 ):
     """部品別生産割当シートを作成"""
     ws = wb.create_sheet('部品別割当')
-    styles = create_styles()
 
     # ヘッダー行
-    headers = ['部品番号', '部品名', 'メインライン', '割当ライン'] + MONTHS + ['年間計']
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = styles['header_font_white']
-        cell.fill = styles['header_fill']
-        cell.border = styles['thin_border']
-        cell.alignment = Alignment(horizontal='center')
-
-    row = 2
-    for part_num in sorted(result.allocation.keys()):
-        part_data = result.allocation[part_num]
+    ws.append(['部品番号', '部品名', 'メインライン', '割当ライン'] + MONTHS + ['年間計'])
+    for cell in ws[1]:
+        cell.style = 'kr_header'
+
+    # 年間計は部品×ライン行をまとめた行列の一括集計で計算
+    entries = [
+        (part_num, line, monthly)
+        for part_num in sorted(result.allocation.keys())
+        for line, monthly in result.allocation[part_num].items()
+    ]
+    totals = (
+        np.array([monthly for _, _, monthly in entries], dtype=np.int64).sum(axis=1)
+        if entries else np.zeros(0, dtype=np.int64)
+    )
+
+    row_styles = ['kr_cell'] * 4 + ['kr_num'] * 13
+    totals_list = totals.tolist()
+    for idx in np.flatnonzero(totals > 0).tolist():
+        part_num, line, monthly = entries[idx]
+        total = totals_list[idx]
+
         spec = specs.get(part_num)
         part_name = spec.part_name if spec else ''
         main_line = spec.main_line if spec else ''
 
-        for line, monthly in part_data.items():
-            if sum(monthly) == 0:
-                continue
-
-            ws.cell(row=row, column=1, value=part_num).border = styles['thin_border']
-            ws.cell(row=row, column=2, value=part_name).border = styles['thin_border']
-            ws.cell(row=row, column=3, value=main_line).border = styles['thin_border']
-
-            line_cell = ws.cell(row=row, column=4, value=line)
-            line_cell.border = styles['thin_border']
-            # サブラインの場合は色付け
-            if line != main_line:
-                line_cell.fill = PatternFill(start_color='FFEB9C', end_color='FFEB9C', fill_type='solid')
-
-            for col, qty in enumerate(monthly, start=5):
-                cell = ws.cell(row=row, column=col, value=qty)
-                cell.border = styles['thin_border']
-                cell.number_format = styles['number_format']
-
-            ws.cell(row=row, column=17, value=sum(monthly)).border = styles['thin_border']
-            ws.cell(row=row, column=17).number_format = styles['number_format']
-
-            row += 1
+        ws.append([part_num, part_name, main_line, line] + monthly + [total])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, row_styles):
+            cell.style = style
+        # サブラインの場合は色付け
+        if line != main_line:
+            cells[3].fill = _SUB_LINE_FILL
 
     # 列幅調整
     ws.column_dimensions['A'].width = 16
@@ -292,134 +288,123 @@ def create_part_allocation_sheet(
     ws.column_dimensions['C'].width = 12
     ws.column_dimensions['D'].width = 12
     for col in range(5, 18):
-        ws.column_dimensions[get_column_letter(col)].width = 10
+        ws.column_dimensions[_COL_LETTERS[col - 1]].width = 10
 
 
 def create_line_detail_sheets(
     wb: Workbook,
     result: OptimizationResult,
     specs: dict[str, PartSpec],
-    capacities: dict[str, int | list[int]],
+    monthly_caps: dict[str, list[int]],
+    styles: dict,
 ):
     """ライン別詳細シートを作成（各ラインごとに1シート）"""
-    styles = create_styles()
-
-    # 月別能力を正規化
-    monthly_caps = _normalize_capacities(capacities)
-
-    for line in DISC_LINES:
+    # 年間計を行列で一括計算
+    caps_mat, loads_mat = _line_matrices(monthly_caps, result.line_loads)
+    annual_caps = caps_mat.sum(axis=1)
+    annual_loads = loads_mat.sum(axis=1)
+    # 能力超過の判定も行列で一括計算（ライン別負荷シートと同じ流儀）
+    over_mat = loads_mat > caps_mat
+    rate_over_mat = over_mat & (caps_mat > 0)
+
+    # 部品×ラインの年間計を一括集計し、ライン→(部品, 月別, 年間計)の
+    # 逆引きを1回で構築する（ライン×全部品の存在チェックを繰り返さない。
+    # 年間計0の行はここで除外。部品番号順はソート済みリストから引き継ぐ）
+    sorted_allocation = sorted(result.allocation.items())
+    alloc_keys = [
+        (part_num, line)
+        for part_num, part_data in sorted_allocation
+        for line in part_data
+    ]
+    line_to_parts: dict[str, list[tuple[str, list[int], int]]] = {}
+    if alloc_keys:
+        alloc_totals = np.array(
+            [result.allocation[pn][ln] for pn, ln in alloc_keys], dtype=np.int64
+        ).sum(axis=1)
+        for (part_num, ln), total in zip(alloc_keys, alloc_totals.tolist()):
+            if total > 0:
+                line_to_parts.setdefault(ln, []).append(
+                    (part_num, result.allocation[part_num][ln], total)
+                )
+
+    for line_idx, line in enumerate(DISC_LINES):
         ws = wb.create_sheet(f'L{line}')
         line_caps = monthly_caps.get(line, [0] * 12)
-        avg_cap = int(sum(line_caps) / 12)
+        avg_cap = int(annual_caps[line_idx]) // 12
 
         # タイトル
         ws['A1'] = f'ライン {line} 生産計画'
-        ws['A1'].font = Font(bold=True, size=12)
+        ws['A1'].font = _SECTION_FONT
         ws.merge_cells('A1:N1')
 
         ws['A2'] = f'平均月間キャパシティ: {avg_cap:,}'
 
-        # ヘッダー行
-        headers = ['部品番号', '割当区分'] + MONTHS + ['年間計']
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=4, column=col, value=header)
-            cell.font = styles['header_font_white']
-            cell.fill = styles['header_fill']
-            cell.border = styles['thin_border']
-            cell.alignment = Alignment(horizontal='center')
-
-        row = 5
-        for part_num, part_data in sorted(result.allocation.items()):
-            if line not in part_data:
-                continue
-
-            monthly = part_data[line]
-            if sum(monthly) == 0:
-                continue
+        # ヘッダー行（行3は空け、行4に配置）
+        ws.append([])
+        ws.append(['部品番号', '割当区分'] + MONTHS + ['年間計'])
+        for cell in ws[4]:
+            cell.style = 'kr_header'
 
+        body_styles = ['kr_cell', 'kr_cell'] + ['kr_num'] * 13
+        for part_num, monthly, total in line_to_parts.get(line, ()):
             spec = specs.get(part_num)
             main_line = spec.main_line if spec else ''
             is_sub = line != main_line
 
-            ws.cell(row=row, column=1, value=part_num).border = styles['thin_border']
-
-            alloc_cell = ws.cell(row=row, column=2, value='サブ' if is_sub else 'メイン')
-            alloc_cell.border = styles['thin_border']
+            ws.append([part_num, 'サブ' if is_sub else 'メイン'] + monthly + [total])
+            cells = ws[ws.max_row]
+            for cell, style in zip(cells, body_styles):
+                cell.style = style
             if is_sub:
-                alloc_cell.fill = PatternFill(start_color='FFEB9C', end_color='FFEB9C', fill_type='solid')
-
-            for col, qty in enumerate(monthly, start=3):
-                cell = ws.cell(row=row, column=col, value=qty)
-                cell.border = styles['thin_border']
-                cell.number_format = styles['number_format']
+                cells[1].fill = _SUB_LINE_FILL
 
-            ws.cell(row=row, column=15, value=sum(monthly)).border = styles['thin_border']
-            ws.cell(row=row, column=15).number_format = styles['number_format']
-
-            row += 1
-
-        # 合計行
-        row += 1
+        # 合計行（データとの間に空行を1行）
+        ws.append([])
         loads = result.line_loads.get(line, [0] * 12)
 
-        ws.cell(row=row, column=1, value='合計').font = Font(bold=True)
-        ws.cell(row=row, column=1).border = styles['thin_border']
-        ws.cell(row=row, column=2, value='').border = styles['thin_border']
-        for col, (load, cap) in enumerate(zip(loads, line_caps), start=3):
-            cell = ws.cell(row=row, column=col, value=load)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['number_format']
-            cell.font = Font(bold=True)
-            if load > cap:
+        ws.append(['合計', ''] + loads + [int(annual_loads[line_idx])])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, ['kr_cell_bold', 'kr_cell'] + ['kr_num_bold'] * 13):
+            cell.style = style
+        for cell, flag in zip(cells[2:14], over_mat[line_idx].tolist()):
+            if flag:
                 cell.fill = styles['warning_fill']
-        ws.cell(row=row, column=15, value=sum(loads)).border = styles['thin_border']
-        ws.cell(row=row, column=15).number_format = styles['number_format']
-        ws.cell(row=row, column=15).font = Font(bold=True)
 
         # キャパシティ行（月別表示）
-        row += 1
-        ws.cell(row=row, column=1, value='キャパシティ').font = Font(bold=True)
-        ws.cell(row=row, column=1).border = styles['thin_border']
-        ws.cell(row=row, column=2, value='').border = styles['thin_border']
-        for col, cap in enumerate(line_caps, start=3):
-            cell = ws.cell(row=row, column=col, value=cap)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['number_format']
-        ws.cell(row=row, column=15, value=sum(line_caps)).border = styles['thin_border']
-        ws.cell(row=row, column=15).number_format = styles['number_format']
+        ws.append(['キャパシティ', ''] + line_caps + [int(annual_caps[line_idx])])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, ['kr_cell_bold', 'kr_cell'] + ['kr_num'] * 13):
+            cell.style = style
 
         # 負荷率行（月別能力で計算）
-        row += 1
-        ws.cell(row=row, column=1, value='負荷率').font = Font(bold=True)
-        ws.cell(row=row, column=1).border = styles['thin_border']
-        ws.cell(row=row, column=2, value='').border = styles['thin_border']
-        for col, (load, cap) in enumerate(zip(loads, line_caps), start=3):
-            rate = load / cap if cap > 0 else 0
-            cell = ws.cell(row=row, column=col, value=rate)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['percent_format']
-            if rate > 1.0:
+        rates = [load / cap if cap > 0 else 0 for load, cap in zip(loads, line_caps)]
+        ws.append(['負荷率', ''] + rates)
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, ['kr_cell_bold', 'kr_cell'] + ['kr_pct'] * 12):
+            cell.style = style
+        for cell, flag in zip(cells[2:14], rate_over_mat[line_idx].tolist()):
+            if flag:
                 cell.fill = styles['warning_fill']
 
         # 列幅調整
         ws.column_dimensions['A'].width = 16
         ws.column_dimensions['B'].width = 10
         for col in range(3, 16):
-            ws.column_dimensions[get_column_letter(col)].width = 10
+            ws.column_dimensions[_COL_LETTERS[col - 1]].width = 10
 
 
 def create_unmet_demand_sheet(
     wb: Workbook,
     result: OptimizationResult,
     specs: dict[str, PartSpec],
+    styles: dict,
 ):
     """未割当（ライン能力超過により生産できなかった分）シートを作成"""
     ws = wb.create_sheet('未割当')
-    styles = create_styles()
 
     # タイトル
     ws['A1'] = '未割当一覧（ライン能力制約により生産できなかった数量）'
-    ws['A1'].font = Font(bold=True, size=12)
+    ws['A1'].font = _SECTION_FONT
     ws.merge_cells('A1:P1')
 
     # 未割当がない場合
@@ -427,62 +412,51 @@ def create_unmet_demand_sheet(
         ws['A3'] = '未割当はありません。全ての需要がライン能力内で充足されました。'
         return
 
-    # ヘッダー行
-    headers = ['部品番号', '部品名', 'メインライン'] + MONTHS + ['年間計']
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = styles['header_font_white']
-        cell.fill = styles['header_fill']
-        cell.border = styles['thin_border']
-        cell.alignment = Alignment(horizontal='center')
+    # ヘッダー行（行2は空け、行3に配置）
+    ws.append([])
+    ws.append(['部品番号', '部品名', 'メインライン'] + MONTHS + ['年間計'])
+    for cell in ws[3]:
+        cell.style = 'kr_header'
 
-    row = 4
+    row_styles = ['kr_cell'] * 3 + ['kr_num'] * 13
     total_unmet = 0
-    for part_num in sorted(result.unmet_demand.keys()):
+    unmet_keys = sorted(result.unmet_demand.keys())
+    unmet_totals = np.array(
+        [result.unmet_demand[pn] for pn in unmet_keys], dtype=np.int64
+    ).sum(axis=1)
+    for part_num, annual_total in zip(unmet_keys, unmet_totals.tolist()):
         monthly_unmet = result.unmet_demand[part_num]
-        if sum(monthly_unmet) == 0:
+        if annual_total == 0:
             continue
 
         spec = specs.get(part_num)
         part_name = spec.part_name if spec else ''
         main_line = spec.main_line if spec else ''
 
-        ws.cell(row=row, column=1, value=part_num).border = styles['thin_border']
-        ws.cell(row=row, column=2, value=part_name).border = styles['thin_border']
-        ws.cell(row=row, column=3, value=main_line).border = styles['thin_border']
-
-        for col, qty in enumerate(monthly_unmet, start=4):
-            cell = ws.cell(row=row, column=col, value=qty)
-            cell.border = styles['thin_border']
-            cell.number_format = styles['number_format']
+        total_unmet += annual_total
+        ws.append([part_num, part_name, main_line] + monthly_unmet + [annual_total])
+        cells = ws[ws.max_row]
+        for cell, style in zip(cells, row_styles):
+            cell.style = style
+        for cell, qty in zip(cells[3:15], monthly_unmet):
             if qty > 0:
                 cell.fill = styles['warning_fill']
+        cells[15].fill = styles['warning_fill']
 
-        annual_total = sum(monthly_unmet)
-        total_unmet += annual_total
-        ws.cell(row=row, column=16, value=annual_total).border = styles['thin_border']
-        ws.cell(row=row, column=16).number_format = styles['number_format']
-        ws.cell(row=row, column=16).fill = styles['warning_fill']
-
-        row += 1
-
-    # 合計行
-    row += 1
-    ws.cell(row=row, column=1, value='合計').font = Font(bold=True)
-    ws.cell(row=row, column=1).border = styles['thin_border']
-    for col in range(2, 16):
-        ws.cell(row=row, column=col, value='').border = styles['thin_border']
-    ws.cell(row=row, column=16, value=total_unmet).border = styles['thin_border']
-    ws.cell(row=row, column=16).number_format = styles['number_format']
-    ws.cell(row=row, column=16).font = Font(bold=True)
-    ws.cell(row=row, column=16).fill = styles['warning_fill']
+    # 合計行（データとの間に空行を1行）
+    ws.append([])
+    ws.append(['合計'] + [''] * 14 + [total_unmet])
+    cells = ws[ws.max_row]
+    for cell, style in zip(cells, ['kr_cell_bold'] + ['kr_cell'] * 14 + ['kr_num_bold']):
+        cell.style = style
+    cells[15].fill = styles['warning_fill']
 
     # 列幅調整
     ws.column_dimensions['A'].width = 16
     ws.column_dimensions['B'].width = 20
     ws.column_dimensions['C'].width = 12
     for col in range(4, 17):
-        ws.column_dimensions[get_column_letter(col)].width = 10
+        ws.column_dimensions[_COL_LETTERS[col - 1]].width = 10
 
 
 def export_to_excel(
@@ -508,13 +482,18 @@ def export_to_excel(
     caps = capacities or DEFAULT_CAPACITIES
 
     wb = Workbook()
+    register_named_styles(wb)
+
+    # 正規化とスタイル生成はシートごとに繰り返さず、ここで1回だけ行う
+    monthly_caps = _normalize_capacities(caps)
+    styles = create_styles()
 
     # 各シートを作成
-    create_summary_sheet(wb, result, caps, pattern_label=pattern_label)
-    create_line_capacity_sheet(wb, result, caps)
-    create_part_allocation_sheet(wb, result, specs)
-    create_unmet_demand_sheet(wb, result, specs)  # 未割当シートを追加
-    create_line_detail_sheets(wb, result, specs, caps)
+    create_summary_sheet(wb, result, monthly_caps, styles, pattern_label=pattern_label)
+    create_line_capacity_sheet(wb, result, monthly_caps, styles)
+    create_part_allocation_sheet(wb, result, specs, styles)
+    create_unmet_demand_sheet(wb, result, specs, styles)  # 未割当シートを追加
+    create_line_detail_sheets(wb, result, specs, monthly_caps, styles)
 
     # 保存
     if output_path:
@@ -524,7 +503,10 @@ def export_to_excel(
         output_dir.mkdir(parents=True, exist_ok=True)
         save_path = str(output_dir / 'optimization_result.xlsx')
 
-    wb.save(save_path)
+    # ZIPを一旦メモリ上で組み立て、1回の書き込みでディスクへ出す
+    buf = io.BytesIO()
+    wb.save(buf)
+    Path(save_path).write_bytes(buf.getvalue())
     print(f"Excel保存: {save_path}")
 
     return save_path
@@ -15,6 +15,9 @@ from openpyxl.comments import Comment
 
 from config import DISC_LINES, DEFAULT_CAPACITIES, MONTHS
 
+# 行ループ内の所属判定はリスト走査ではなく集合で行う
+_DISC_SET = frozenset(DISC_LINES)
+
 
 @dataclass
 class InputConfig:
@@ -39,26 +42,35 @@ class InputConfig:
     email_subject: str
 
 
-def create_styles():
-    """共通スタイルを定義"""
-    header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
-    header_font = Font(bold=True, color='FFFFFF', size=11)
-    subheader_fill = PatternFill(start_color='D9E2F3', end_color='D9E2F3', fill_type='solid')
-    input_fill = PatternFill(start_color='FFFFCC', end_color='FFFFCC', fill_type='solid')
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+# スタイルはシートごと・ループごとに生成せず、モジュール定数の
+# 同一インスタンスを共有する（openpyxlの重複排除コストを避ける）
+_HEADER_FILL = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
+_HEADER_FONT = Font(bold=True, color='FFFFFF', size=11)
+_SUBHEADER_FILL = PatternFill(start_color='D9E2F3', end_color='D9E2F3', fill_type='solid')
+_INPUT_FILL = PatternFill(start_color='FFFFCC', end_color='FFFFCC', fill_type='solid')
+
+_THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+_BOLD_FONT = Font(bold=True)
+_TITLE_FONT = Font(bold=True, size=14)
+_SECTION_FONT = Font(bold=True, size=12)
+_NOTE_FONT = Font(color='666666', italic=True)
+_CENTER = Alignment(horizontal='center')
 
+
+def create_styles():
+    """共通スタイルを定義（モジュール定数の共有インスタンスを返す）"""
     return {
-        'header_fill': header_fill,
-        'header_font': header_font,
-        'subheader_fill': subheader_fill,
-        'input_fill': input_fill,
-        'thin_border': thin_border,
+        'header_fill': _HEADER_FILL,
+        'header_font': _HEADER_FONT,
+        'subheader_fill': _SUBHEADER_FILL,
+        'input_fill': _INPUT_FILL,
+        'thin_border': _THIN_BORDER,
     }
 
 
@@ -70,12 +82,12 @@ def create_settings_sheet(wb: Workbook):
 
     # タイトル
     ws['A1'] = 'KIRIU ライン負荷最適化 - 入力設定'
-    ws['A1'].font = Font(bold=True, size=14)
+    ws['A1'].font = _TITLE_FONT
     ws.merge_cells('A1:D1')
 
     # ファイル設定セクション
     ws['A3'] = '【入力ファイル設定】'
-    ws['A3'].font = Font(bold=True, size=12)
+    ws['A3'].font = _SECTION_FONT
 
     settings = [
         ('A4', '設備仕様ファイル', 'B4', '', '設備仕様が記載されたExcelファイルのパス'),
@@ -85,7 +97,7 @@ def create_settings_sheet(wb: Workbook):
 
     for label_cell, label, value_cell, default, comment_text in settings:
         ws[label_cell] = label
-        ws[label_cell].font = Font(bold=True)
+        ws[label_cell].font = _BOLD_FONT
         ws[label_cell].border = styles['thin_border']
 
         ws[value_cell] = default
@@ -95,10 +107,10 @@ def create_settings_sheet(wb: Workbook):
 
     # ソルバー設定セクション
     ws['A8'] = '【ソルバー設定】'
-    ws['A8'].font = Font(bold=True, size=12)
+    ws['A8'].font = _SECTION_FONT
 
     ws['A9'] = '制限時間（秒）'
-    ws['A9'].font = Font(bold=True)
+    ws['A9'].font = _BOLD_FONT
     ws['A9'].border = styles['thin_border']
     ws['B9'] = 300
     ws['B9'].fill = styles['input_fill']
@@ -107,17 +119,17 @@ def create_settings_sheet(wb: Workbook):
 
     # 出力設定セクション
     ws['A11'] = '【出力設定】'
-    ws['A11'].font = Font(bold=True, size=12)
+    ws['A11'].font = _SECTION_FONT
 
     ws['A12'] = '出力ディレクトリ'
-    ws['A12'].font = Font(bold=True)
+    ws['A12'].font = _BOLD_FONT
     ws['A12'].border = styles['thin_border']
     ws['B12'] = './output'
     ws['B12'].fill = styles['input_fill']
     ws['B12'].border = styles['thin_border']
 
     ws['A13'] = 'Google Drive出力'
-    ws['A13'].font = Font(bold=True)
+    ws['A13'].font = _BOLD_FONT
     ws['A13'].border = styles['thin_border']
     ws['B13'] = 'OFF'
     ws['B13'].fill = styles['input_fill']
@@ -128,7 +140,7 @@ def create_settings_sheet(wb: Workbook):
     dv.add(ws['B13'])
 
     ws['A14'] = 'Google DriveフォルダID'
-    ws['A14'].font = Font(bold=True)
+    ws['A14'].font = _BOLD_FONT
     ws['A14'].border = styles['thin_border']
     ws['B14'] = ''
     ws['B14'].fill = styles['input_fill']
@@ -136,10 +148,10 @@ def create_settings_sheet(wb: Workbook):
     ws['B14'].comment = Comment('Google DriveのフォルダIDを入力（URLの末尾の文字列）', 'System')
 
     ws['A16'] = '【メール設定】'
-    ws['A16'].font = Font(bold=True, size=12)
+    ws['A16'].font = _SECTION_FONT
 
     ws['A17'] = 'メール送信'
-    ws['A17'].font = Font(bold=True)
+    ws['A17'].font = _BOLD_FONT
     ws['A17'].border = styles['thin_border']
     ws['B17'] = 'OFF'
     ws['B17'].fill = styles['input_fill']
@@ -149,14 +161,14 @@ def create_settings_sheet(wb: Workbook):
     dv2.add(ws['B17'])
 
     ws['A18'] = '送信先メールアドレス'
-    ws['A18'].font = Font(bold=True)
+    ws['A18'].font = _BOLD_FONT
     ws['A18'].border = styles['thin_border']
     ws['B18'] = ''
     ws['B18'].fill = styles['input_fill']
     ws['B18'].border = styles['thin_border']
 
     ws['A19'] = 'メール件名'
-    ws['A19'].font = Font(bold=True)
+    ws['A19'].font = _BOLD_FONT
     ws['A19'].border = styles['thin_border']
     ws['B19'] = 'ライン負荷最適化結果'
     ws['B19'].fill = styles['input_fill']
@@ -174,45 +186,45 @@ def create_capacity_sheet(wb: Workbook):
 
     # タイトル
     ws['A1'] = 'ライン別月間能力設定'
-    ws['A1'].font = Font(bold=True, size=14)
+    ws['A1'].font = _TITLE_FONT
     ws.merge_cells('A1:N1')
 
     ws['A2'] = '※黄色セルに能力値を入力してください。月ごとに異なる能力を設定可能です。'
-    ws['A2'].font = Font(color='666666', italic=True)
+    ws['A2'].font = _NOTE_FONT
 
-    # ヘッダー行
-    headers = ['ライン'] + MONTHS + ['備考']
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=4, column=col, value=header)
+    # ヘッダー行（行3は空け、行4に配置。セル単位ではなく行単位でappendする）
+    ws.append([])
+    ws.append(['ライン'] + MONTHS + ['備考'])
+    for cell in ws[4]:
         cell.font = styles['header_font']
         cell.fill = styles['header_fill']
         cell.border = styles['thin_border']
-        cell.alignment = Alignment(horizontal='center')
+        cell.alignment = _CENTER
 
-    # ライン別能力データ
-    row = 5
+    # ライン別能力データ（1行ずつappendし、スタイルはその行を1回だけ走査）
     for line in DISC_LINES:
-        ws.cell(row=row, column=1, value=line).border = styles['thin_border']
-        ws.cell(row=row, column=1).font = Font(bold=True)
-
         default_cap = DEFAULT_CAPACITIES.get(line, 0)
-        for col in range(2, 14):  # 月別能力
-            cell = ws.cell(row=row, column=col, value=default_cap)
-            cell.fill = styles['input_fill']
+        ws.append([line] + [default_cap] * 12 + [''])
+        cells = ws[ws.max_row]
+        cells[0].font = _BOLD_FONT
+        for cell in cells:
             cell.border = styles['thin_border']
+        for cell in cells[1:13]:  # 月別能力
+            cell.fill = styles['input_fill']
             cell.number_format = '#,##0'
 
-        # 備考列
-        ws.cell(row=row, column=14, value='').border = styles['thin_border']
-
-        row += 1
-
-    # 合計行
-    ws.cell(row=row + 1, column=1, value='合計').font = Font(bold=True)
-    for col in range(2, 14):
-        cell = ws.cell(row=row + 1, column=col)
-        cell.value = f'=SUM({get_column_letter(col)}5:{get_column_letter(col)}{row-1})'
-        cell.font = Font(bold=True)
+    data_end = ws.max_row
+
+    # 合計行（データとの間に空行を1行）
+    ws.append([])
+    ws.append(['合計'] + [
+        f'=SUM({get_column_letter(col)}5:{get_column_letter(col)}{data_end})'
+        for col in range(2, 14)
+    ])
+    cells = ws[ws.max_row]
+    cells[0].font = _BOLD_FONT
+    for cell in cells[1:13]:
+        cell.font = _BOLD_FONT
         cell.border = styles['thin_border']
         cell.number_format = '#,##0'
 
@@ -229,11 +241,11 @@ def create_parts_master_sheet(wb: Workbook):
 
     # タイトル
     ws['A1'] = '部品マスタ（追加・上書き用）'
-    ws['A1'].font = Font(bold=True, size=14)
+    ws['A1'].font = _TITLE_FONT
     ws.merge_cells('A1:F1')
 
     ws['A2'] = '※設備仕様ファイルに無い部品や、ライン割当を上書きしたい場合に使用'
-    ws['A2'].font = Font(color='666666', italic=True)
+    ws['A2'].font = _NOTE_FONT
 
     # ヘッダー行
     headers = ['部品番号', '部品名', 'メインライン', 'サブ1ライン', 'サブ2ライン', '備考']
@@ -242,7 +254,7 @@ def create_parts_master_sheet(wb: Workbook):
         cell.font = styles['header_font']
         cell.fill = styles['header_fill']
         cell.border = styles['thin_border']
-        cell.alignment = Alignment(horizontal='center')
+        cell.alignment = _CENTER
 
     # 入力行のテンプレート（10行分）
     for row in range(5, 15):
@@ -252,13 +264,11 @@ def create_parts_master_sheet(wb: Workbook):
             cell.border = styles['thin_border']
 
     # ライン選択用のドロップダウン
+    # （セル単位に30個登録せず、矩形レンジ1つのsqrefにまとめる）
     line_list = ','.join(DISC_LINES)
     dv = DataValidation(type='list', formula1=f'"{line_list}"', allow_blank=True)
     ws.add_data_validation(dv)
-    for row in range(5, 15):
-        dv.add(ws.cell(row=row, column=3))
-        dv.add(ws.cell(row=row, column=4))
-        dv.add(ws.cell(row=row, column=5))
+    dv.add('C5:E14')
 
     # 列幅調整
     ws.column_dimensions['A'].width = 18
@@ -291,52 +301,47 @@ def generate_input_template(output_path: str = 'input_template.xlsx') -> str:
     return output_path
 
 
-def load_input_config(template_path: str) -> InputConfig:
-    """
-    入力テンプレートから設定を読み込む
-
-    Args:
-        template_path: テンプレートファイルパス
-
-    Returns:
-        InputConfig
-    """
-    wb = load_workbook(template_path, data_only=True)
-
-    # 設定シートから読み込み
+def _load_input_config_from_wb(wb) -> InputConfig:
+    """開いたテンプレートワークブックからInputConfigを組み立てる"""
+    # 設定シートはB列の数セルだけ使うため、1回の走査でB列を辞書に引く
+    # （read_onlyモードではセル単位のランダムアクセスが遅い）
     ws_settings = wb['設定']
+    b_values = {
+        row_idx: row[0]
+        for row_idx, row in enumerate(
+            ws_settings.iter_rows(min_row=1, max_row=19, min_col=2, max_col=2, values_only=True),
+            start=1,
+        )
+    }
 
-    spec_file = ws_settings['B4'].value or ''
-    plan_file = ws_settings['B5'].value or ''
-    plan_sheet = ws_settings['B6'].value or ''
-    time_limit = int(ws_settings['B9'].value or 300)
-    output_dir = ws_settings['B12'].value or './output'
-    output_to_gdrive = str(ws_settings['B13'].value).upper() == 'ON'
-    gdrive_folder_id = ws_settings['B14'].value or ''
-    send_email = str(ws_settings['B17'].value).upper() == 'ON'
-    email_to = ws_settings['B18'].value or ''
-    email_subject = ws_settings['B19'].value or 'ライン負荷最適化結果'
-
-    # ライン能力シートから読み込み
+    spec_file = b_values.get(4) or ''
+    plan_file = b_values.get(5) or ''
+    plan_sheet = b_values.get(6) or ''
+    time_limit = int(b_values.get(9) or 300)
+    output_dir = b_values.get(12) or './output'
+    output_to_gdrive = str(b_values.get(13)).upper() == 'ON'
+    gdrive_folder_id = b_values.get(14) or ''
+    send_email = str(b_values.get(17)).upper() == 'ON'
+    email_to = b_values.get(18) or ''
+    email_subject = b_values.get(19) or 'ライン負荷最適化結果'
+
+    # ライン能力シートから読み込み（行単位で1回走査）
     ws_capacity = wb['ライン能力']
     capacities = {}
 
-    for row in range(5, 5 + len(DISC_LINES)):
-        line = ws_capacity.cell(row=row, column=1).value
-        if line and line in DISC_LINES:
-            monthly_caps = []
-            for col in range(2, 14):
-                val = ws_capacity.cell(row=row, column=col).value
-                monthly_caps.append(int(val) if val else 0)
+    for row_values in ws_capacity.iter_rows(
+        min_row=5, max_row=4 + len(DISC_LINES), min_col=1, max_col=13, values_only=True
+    ):
+        line = row_values[0]
+        if line and line in _DISC_SET:
+            monthly_caps = [int(val) if val else 0 for val in row_values[1:13]]
 
             # 全月同じなら固定値として保存
-            if len(set(monthly_caps)) == 1:
+            if all(cap == monthly_caps[0] for cap in monthly_caps):
                 capacities[line] = monthly_caps[0]
             else:
                 capacities[line] = monthly_caps
 
-    wb.close()
-
     return InputConfig(
         spec_file=spec_file,
         plan_file=plan_file,
@@ -352,24 +357,16 @@ def load_input_config(template_path: str) -> InputConfig:
     )
 
 
-def load_parts_master(template_path: str) -> dict:
-    """
-    部品マスタシートから追加部品情報を読み込む
-
-    Args:
-        template_path: テンプレートファイルパス
-
-    Returns:
-        dict[部品番号, {part_name, main_line, sub1_line, sub2_line}]
-    """
+def _load_parts_master_from_wb(wb) -> dict:
+    """開いたテンプレートワークブックから部品マスタを読み込む"""
     from data_loader import normalize_part_number, normalize_line_name
 
-    wb = load_workbook(template_path, data_only=True)
     ws = wb['部品マスタ']
 
     parts = {}
-    for row in range(5, ws.max_row + 1):
-        part_num_raw = ws.cell(row=row, column=1).value
+    # セル単位のws.cell呼び出しではなく行単位で1回走査する
+    for row_values in ws.iter_rows(min_row=5, min_col=1, max_col=5, values_only=True):
+        part_num_raw, part_name_raw, main_raw, sub1_raw, sub2_raw = row_values
         if not part_num_raw:
             continue
 
@@ -377,22 +374,67 @@ def load_parts_master(template_path: str) -> dict:
         if not part_num:
             continue
 
-        part_name = ws.cell(row=row, column=2).value or ''
-        main_line = normalize_line_name(str(ws.cell(row=row, column=3).value or ''))
-        sub1_line = normalize_line_name(str(ws.cell(row=row, column=4).value or ''))
-        sub2_line = normalize_line_name(str(ws.cell(row=row, column=5).value or ''))
-
         parts[part_num] = {
-            'part_name': part_name,
-            'main_line': main_line,
-            'sub1_line': sub1_line,
-            'sub2_line': sub2_line,
+            'part_name': part_name_raw or '',
+            'main_line': normalize_line_name(str(main_raw or '')),
+            'sub1_line': normalize_line_name(str(sub1_raw or '')),
+            'sub2_line': normalize_line_name(str(sub2_raw or '')),
         }
-
-    wb.close()
     return parts
 
 
+def load_input_config(template_path: str) -> InputConfig:
+    """
+    入力テンプレートから設定を読み込む
+
+    Args:
+        template_path: テンプレートファイルパス
+
+    Returns:
+        InputConfig
+    """
+    # read_only: 値を読むだけなのでCell/Styleオブジェクトを組み立てない
+    wb = load_workbook(template_path, data_only=True, read_only=True)
+    try:
+        return _load_input_config_from_wb(wb)
+    finally:
+        wb.close()
+
+
+def load_parts_master(template_path: str) -> dict:
+    """
+    部品マスタシートから追加部品情報を読み込む
+
+    Args:
+        template_path: テンプレートファイルパス
+
+    Returns:
+        dict[部品番号, {part_name, main_line, sub1_line, sub2_line}]
+    """
+    wb = load_workbook(template_path, data_only=True, read_only=True)
+    try:
+        return _load_parts_master_from_wb(wb)
+    finally:
+        wb.close()
+
+
+def load_template(template_path: str) -> tuple[InputConfig, dict]:
+    """
+    設定と部品マスタをまとめて読み込む（ワークブックは1回だけ開く）
+
+    Args:
+        template_path: テンプレートファイルパス
+
+    Returns:
+        (InputConfig, 部品マスタdict)
+    """
+    wb = load_workbook(template_path, data_only=True, read_only=True)
+    try:
+        return _load_input_config_from_wb(wb), _load_parts_master_from_wb(wb)
+    finally:
+        wb.close()
+
+
 def get_monthly_capacities(capacities: dict[str, list[int] | int]) -> dict[str, list[int]]:
     """
     能力設定を月別形式に変換
@@ -28,10 +28,9 @@ from config import (
     PLAN_FILE,
     PLAN_SHEET,
 )
-from data_loader import load_all_data, load_equipment_spec, load_production_plan, merge_data, PartSpec
-from model import optimize
-from visualize import generate_all_outputs, generate_text_report
-from excel_output import export_to_excel
+# data_loader / model / visualize / excel_output（とその先のpandas,
+# ortools, matplotlib, openpyxl）は重いので、実際に最適化を実行する
+# 関数の中でインポートする。--generate-template や --help では読み込まない。
 
 # 負荷率パターン（100%, 90%, 80%）
 LOAD_RATE_PATTERNS = [1.0, 0.9, 0.8]
@@ -140,22 +139,41 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+
+def _sum_nested(rows) -> int:
+    """[月別12値]の並びを一括で合計する（Pythonの二重ループを避ける）"""
+    import numpy as np
+    rows = list(rows)
+    if not rows:
+        return 0
+    return int(np.array(rows, dtype=np.int64).sum())
+
 def load_capacities(filepath: str | None) -> dict[str, int]:
     """ライン能力設定を読み込む"""
     if filepath is None:
         return DEFAULT_CAPACITIES.copy()
 
     print(f"能力設定ファイル読み込み: {filepath}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        caps = json.load(f)
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    try:
+        import orjson
+        caps = orjson.loads(raw)
+    except ImportError:
+        # orjson未導入環境では標準jsonにフォールバック
+        caps = json.loads(raw)
 
-    # 値が整数であることを確認
+    # 値が整数であることを確認（JSON側がfloat/文字列でも受け付ける）
     return {k: int(v) for k, v in caps.items()}
 
 
 def run_with_template(template_path: str) -> int:
     """テンプレートから設定を読み込んで実行"""
-    from input_template import load_input_config, load_parts_master, get_monthly_capacities
+    from data_loader import load_equipment_spec, load_production_plan, merge_data, PartSpec
+    from model import optimize
+    from visualize import generate_all_outputs
+    from excel_output import export_to_excel
+    from input_template import load_template, get_monthly_capacities
     from output_handler import process_outputs, create_result_email_body
 
     print("=" * 60)
@@ -164,10 +182,9 @@ def run_with_template(template_path: str) -> int:
     print()
     print(f"【テンプレート読み込み】: {template_path}")
 
-    # テンプレートから設定読み込み
+    # テンプレートから設定読み込み（ファイルは1回だけ開く）
     try:
-        config = load_input_config(template_path)
-        parts_master = load_parts_master(template_path)
+        config, parts_master = load_template(template_path)
     except Exception as e:
         print(f"エラー: テンプレートの読み込みに失敗しました - {e}")
         return 1
@@ -178,10 +195,11 @@ def run_with_template(template_path: str) -> int:
     print(f"  制限時間: {config.time_limit}秒")
     print(f"  出力ディレクトリ: {config.output_dir}")
 
-    # 出力ディレクトリを設定
+    # 出力ディレクトリを設定（Pathはここで1回だけ組み立てる）
     import config as app_config
     app_config.OUTPUT_DIR = config.output_dir
-    Path(config.output_dir).mkdir(parents=True, exist_ok=True)
+    output_base = Path(config.output_dir)
+    output_base.mkdir(parents=True, exist_ok=True)
 
     # データ読み込み
     try:
@@ -218,21 +236,31 @@ def run_with_template(template_path: str) -> int:
     # ライン能力設定（月別対応）
     monthly_caps = get_monthly_capacities(config.capacities)
     # 最適化には各月の最大値を使用（または平均値）
-    capacities = {line: max(caps) if isinstance(caps, list) else caps
-                  for line, caps in config.capacities.items()}
-
+    # dictの構築と表示を1回の走査にまとめる
+    capacities = {}
     print("\n【ライン能力設定】")
-    for line, cap in sorted(capacities.items()):
+    for line in sorted(config.capacities):
+        caps = config.capacities[line]
+        cap = max(caps) if isinstance(caps, list) else caps
+        capacities[line] = cap
         print(f"  {line}: {cap:,}")
 
     # 複数負荷率パターンで最適化実行
-    output_base = Path(config.output_dir)
     results_summary = []
     all_output_files = []
+    first_success_label = None
+
+    # 能力合計はパターン間で不変なのでループの外で1回だけ計算
+    total_cap = sum(capacities.get(line, 0) for line in DISC_LINES) * 12
+
+    # パターン別出力ディレクトリは先にまとめて作成し、ループ内はdict参照にする
+    pattern_dirs = {rate: output_base / f"{int(rate * 100)}pct" for rate in LOAD_RATE_PATTERNS}
+    for d in pattern_dirs.values():
+        d.mkdir(parents=True, exist_ok=True)
 
     for rate in LOAD_RATE_PATTERNS:
         pct_label = f"{int(rate * 100)}pct"
-        pattern_dir = output_base / pct_label
+        pattern_dir = pattern_dirs[rate]
 
         print(f"\n{'=' * 60}")
         print(f"【最適化実行】負荷率上限: {int(rate * 100)}%")
@@ -246,23 +274,22 @@ def run_with_template(template_path: str) -> int:
             continue
 
         # 結果サマリーを収集
-        total_load = sum(sum(loads) for loads in result.line_loads.values())
-        total_cap = sum(capacities.get(line, 0) for line in DISC_LINES) * 12
+        total_load = _sum_nested(result.line_loads.values())
         avg_rate_pct = total_load / total_cap * 100 if total_cap > 0 else 0
-        total_unmet = sum(sum(u) for u in result.unmet_demand.values()) if result.unmet_demand else 0
+        total_unmet = _sum_nested(result.unmet_demand.values()) if result.unmet_demand else 0
         results_summary.append((rate, pct_label, result.status, result.solve_time, avg_rate_pct, total_unmet))
+        if first_success_label is None:
+            first_success_label = pct_label
 
         # 結果出力
-        pattern_dir.mkdir(parents=True, exist_ok=True)
         generate_all_outputs(result, capacities, output_dir=str(pattern_dir))
-        export_to_excel(result, specs, capacities, str(pattern_dir / 'optimization_result.xlsx'))
-
-        all_output_files.extend([
-            str(pattern_dir / 'optimization_result.xlsx'),
-            str(pattern_dir / 'optimization_report.txt'),
-            str(pattern_dir / 'line_loads.png'),
-            str(pattern_dir / 'load_summary.png'),
-        ])
+        pattern_files = [
+            str(pattern_dir / name)
+            for name in ('optimization_result.xlsx', 'optimization_report.txt',
+                         'line_loads.png', 'load_summary.png')
+        ]
+        export_to_excel(result, specs, capacities, pattern_files[0])
+        all_output_files.extend(pattern_files)
 
     # パターン比較サマリー
     print(f"\n{'=' * 60}")
@@ -279,13 +306,14 @@ def run_with_template(template_path: str) -> int:
     # Google Drive / メール送信（最初の成功結果のレポートを使用）
     if config.output_to_gdrive or config.send_email:
         # 100%パターンのレポートを基にメール本文を作成
-        first_success = next(
-            ((r, l) for r, l, s, *_ in results_summary if s in ('OPTIMAL', 'FEASIBLE')),
-            None,
-        )
-        if first_success:
-            report_path = output_base / f"{first_success[1]}" / 'optimization_report.txt'
-            report_text = report_path.read_text(encoding='utf-8') if report_path.exists() else ""
+        if first_success_label is not None:
+            report_path = output_base / first_success_label / 'optimization_report.txt'
+            if report_path.exists():
+                # メール本文に使う先頭2000文字だけ読む（全文は読み込まない）
+                with report_path.open('r', encoding='utf-8') as f:
+                    report_text = f.read(2000)
+            else:
+                report_text = ""
         else:
             report_text = "全パターンで最適化に失敗しました。"
 
@@ -293,7 +321,7 @@ def run_with_template(template_path: str) -> int:
             status=results_summary[0][2] if results_summary else "UNKNOWN",
             objective_value=None,
             solve_time=0,
-            summary=report_text[:2000],
+            summary=report_text,
         )
 
         process_outputs(
@@ -341,7 +369,7 @@ def run_with_spreadsheet(spreadsheet_id: str, time_limit: int = DEFAULT_TIME_LIM
         raise
 
     print(f"\n  部品数: {len(specs)}")
-    print(f"  総需要: {sum(sum(d.monthly_demand) for d in demands.values()):,}")
+    print(f"  総需要: {_sum_nested(d.monthly_demand for d in demands.values()):,}")
 
     # 新シートがあるか確認 → 勤務体制パターン方式 / 旧方式フォールバック
     use_work_patterns = False
@@ -359,6 +387,9 @@ def run_with_spreadsheet(spreadsheet_id: str, time_limit: int = DEFAULT_TIME_LIM
 
 def _run_spreadsheet_work_patterns(spreadsheet_id, specs, demands, time_limit):
     """勤務体制パターン方式でSpreadsheet最適化を実行"""
+    import numpy as np
+
+    from model import optimize
     from sheets_io import read_work_patterns, read_line_jph, read_monthly_working_days, write_results
     from config import calculate_monthly_capacities
 
@@ -375,17 +406,25 @@ def _run_spreadsheet_work_patterns(spreadsheet_id, specs, demands, time_limit):
     # パターン別の月別能力を計算
     pattern_capacities = calculate_monthly_capacities(jph, work_patterns, working_days)
 
+    # パターン×ライン×12ヶ月の行列に積んで、平均・合計を一括集計する
+    pattern_names = list(pattern_capacities)
+    cap_cube = np.array(
+        [[pattern_capacities[p].get(line, [0] * 12) for line in DISC_LINES] for p in pattern_names],
+        dtype=np.int64,
+    )
+    line_avgs = cap_cube.sum(axis=2) // 12      # (パターン, ライン)
+    pattern_totals = cap_cube.sum(axis=(1, 2))  # パターン別の年間能力合計
+
     print("\n【パターン別月間能力（平均）】")
-    for pattern_name, caps in pattern_capacities.items():
+    for p_idx, pattern_name in enumerate(pattern_names):
         print(f"  {pattern_name}:")
-        for line in DISC_LINES:
-            avg = sum(caps[line]) // 12
-            print(f"    {line}: {avg:,}/月")
+        for l_idx, line in enumerate(DISC_LINES):
+            print(f"    {line}: {int(line_avgs[p_idx, l_idx]):,}/月")
 
     # 勤務体制パターンごとに最適化実行
     results_summary = []
 
-    for pattern_name, capacities in pattern_capacities.items():
+    for p_idx, (pattern_name, capacities) in enumerate(pattern_capacities.items()):
         sheet_suffix = f"_{pattern_name}"
 
         print(f"\n{'=' * 60}")
@@ -400,10 +439,10 @@ def _run_spreadsheet_work_patterns(spreadsheet_id, specs, demands, time_limit):
             continue
 
         # 結果サマリーを収集
-        total_load = sum(sum(loads) for loads in result.line_loads.values())
-        total_cap = sum(sum(capacities.get(line, [0] * 12)) for line in DISC_LINES)
+        total_load = _sum_nested(result.line_loads.values())
+        total_cap = int(pattern_totals[p_idx])
         avg_rate_pct = total_load / total_cap * 100 if total_cap > 0 else 0
-        total_unmet = sum(sum(u) for u in result.unmet_demand.values()) if result.unmet_demand else 0
+        total_unmet = _sum_nested(result.unmet_demand.values()) if result.unmet_demand else 0
         results_summary.append((pattern_name, result.status, result.solve_time, avg_rate_pct, total_unmet))
 
         # 結果をスプレッドシートに書き込み
@@ -438,6 +477,7 @@ def _run_spreadsheet_work_patterns(spreadsheet_id, specs, demands, time_limit):
 
 def _run_spreadsheet_load_rate(spreadsheet_id, specs, demands, time_limit):
     """旧方式（負荷率パターン）でSpreadsheet最適化を実行"""
+    from model import optimize
     from sheets_io import read_line_capacities, write_results
 
     # ライン能力読み込み
@@ -450,6 +490,8 @@ def _run_spreadsheet_load_rate(spreadsheet_id, specs, demands, time_limit):
 
     # 複数負荷率パターンで最適化実行
     results_summary = []
+    # 能力合計はパターン間で不変なのでループの外で1回だけ計算
+    total_cap = _sum_nested(capacities.get(line, [0] * 12) for line in DISC_LINES)
 
     for rate in LOAD_RATE_PATTERNS:
         pct_label = f"{int(rate * 100)}pct"
@@ -467,10 +509,9 @@ def _run_spreadsheet_load_rate(spreadsheet_id, specs, demands, time_limit):
             continue
 
         # 結果サマリーを収集
-        total_load = sum(sum(loads) for loads in result.line_loads.values())
-        total_cap = sum(sum(capacities.get(line, [0] * 12)) for line in DISC_LINES)
+        total_load = _sum_nested(result.line_loads.values())
         avg_rate_pct = total_load / total_cap * 100 if total_cap > 0 else 0
-        total_unmet = sum(sum(u) for u in result.unmet_demand.values()) if result.unmet_demand else 0
+        total_unmet = _sum_nested(result.unmet_demand.values()) if result.unmet_demand else 0
         results_summary.append((rate, pct_label, result.status, result.solve_time, avg_rate_pct, total_unmet))
 
         # 結果をスプレッドシートに書き込み
@@ -528,6 +569,11 @@ def main() -> int:
         return run_with_template(args.template)
 
     # 従来モード（コマンドライン引数）
+    from data_loader import load_equipment_spec, load_production_plan, merge_data
+    from model import optimize
+    from visualize import generate_all_outputs
+    from excel_output import export_to_excel
+
     print("=" * 60)
     print("KIRIU ライン負荷最適化システム")
     print("=" * 60)
@@ -559,7 +605,7 @@ def main() -> int:
     if args.dry_run:
         print("\n【ドライラン完了】")
         print(f"  部品数: {len(specs)}")
-        print(f"  総需要: {sum(sum(d.monthly_demand) for d in demands.values()):,}")
+        print(f"  総需要: {_sum_nested(d.monthly_demand for d in demands.values()):,}")
         return 0
 
     # ライン能力読み込み
@@ -575,10 +621,18 @@ def main() -> int:
     # 複数負荷率パターンで最適化実行
     output_base = Path(args.output_dir)
     results_summary = []
+    # 能力合計はパターン間で不変なのでループの外で1回だけ計算
+    total_cap = sum(capacities.get(line, 0) for line in DISC_LINES) * 12
+
+    # パターン別出力ディレクトリは先にまとめて作成（--no-visualize時は出力しない）
+    pattern_dirs = {rate: output_base / f"{int(rate * 100)}pct" for rate in LOAD_RATE_PATTERNS}
+    if not args.no_visualize:
+        for d in pattern_dirs.values():
+            d.mkdir(parents=True, exist_ok=True)
 
     for rate in LOAD_RATE_PATTERNS:
         pct_label = f"{int(rate * 100)}pct"
-        pattern_dir = output_base / pct_label
+        pattern_dir = pattern_dirs[rate]
 
         print(f"\n{'=' * 60}")
         print(f"【最適化実行】負荷率上限: {int(rate * 100)}%")
@@ -592,15 +646,13 @@ def main() -> int:
             continue
 
         # 結果サマリーを収集
-        total_load = sum(sum(loads) for loads in result.line_loads.values())
-        total_cap = sum(capacities.get(line, 0) for line in DISC_LINES) * 12
+        total_load = _sum_nested(result.line_loads.values())
         avg_rate_pct = total_load / total_cap * 100 if total_cap > 0 else 0
-        total_unmet = sum(sum(u) for u in result.unmet_demand.values()) if result.unmet_demand else 0
+        total_unmet = _sum_nested(result.unmet_demand.values()) if result.unmet_demand else 0
         results_summary.append((rate, pct_label, result.status, result.solve_time, avg_rate_pct, total_unmet))
 
         # 結果出力
         if not args.no_visualize:
-            pattern_dir.mkdir(parents=True, exist_ok=True)
             generate_all_outputs(result, capacities, output_dir=str(pattern_dir))
             export_to_excel(result, specs, capacities, str(pattern_dir / 'optimization_result.xlsx'))
         else:
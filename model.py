@@ -40,11 +40,13 @@ class LineOptimizer:
         capacities: dict[str, int | list[int]] | None = None,
         time_limit: int = DEFAULT_TIME_LIMIT_SECONDS,
         load_rate_limit: float = 1.0,
+        hint_allocation: dict | None = None,
     ):
         self.specs = specs
         self.demands = demands
         self.time_limit = time_limit
         self.load_rate_limit = load_rate_limit
+        self.hint_allocation = hint_allocation
 
         # 月別能力に正規化: {ライン: [12ヶ月分の能力]}
         self.capacities = self._normalize_capacities(capacities or DEFAULT_CAPACITIES.copy())
@@ -212,18 +214,23 @@ class LineOptimizer:
         # ===== 目的関数 =====
         print("  目的関数設定中...")
 
-        objective_terms = []
+        # 係数×変数のPythonレベル乗算を項ごとに行うと中間式が大量にできるため、
+        # 変数と係数のリストを集めてWeightedSumで一括構築する
+        objective_vars = []
+        objective_coeffs = []
 
         # 最優先: 需要未充足最小化（能力制約により生産できなかった分）
         WEIGHT_UNMET = 100000
-        for (part_num, month), var in self.unmet_demand.items():
-            objective_terms.append(WEIGHT_UNMET * var)
+        for var in self.unmet_demand.values():
+            objective_vars.append(var)
+            objective_coeffs.append(WEIGHT_UNMET)
 
         # 注: オーバーフローは禁止のため、目的関数に含めない
 
         # 第1優先: サブライン使用回数最小化
-        for (part_num, month), var in self.use_sub.items():
-            objective_terms.append(WEIGHT_SUB_USE * var)
+        for var in self.use_sub.values():
+            objective_vars.append(var)
+            objective_coeffs.append(WEIGHT_SUB_USE)
 
         # 第2優先: サブラインへの生産量最小化
         for part_num in self.demands:
@@ -236,14 +243,31 @@ class LineOptimizer:
                 if sub_line:
                     for month in range(12):
                         if (part_num, sub_line, month) in self.x:
-                            objective_terms.append(
-                                WEIGHT_SUB_QTY * self.x[part_num, sub_line, month]
-                            )
+                            objective_vars.append(self.x[part_num, sub_line, month])
+                            objective_coeffs.append(WEIGHT_SUB_QTY)
+
+        self.model.Minimize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_coeffs))
 
-        self.model.Minimize(sum(objective_terms))
+        # ===== 探索ヒント（ウォームスタート） =====
+        if self.hint_allocation:
+            self._add_solution_hint()
 
         print(f"  モデル構築完了: 変数数={len(self.x) + len(self.use_sub)}")
 
+    def _add_solution_hint(self) -> None:
+        """既存の割当解を探索ヒントとして設定する（ウォームスタート）
+
+        比較APIのように負荷率上限だけが異なる連続ソルブでは、前パターンの
+        解から探索を始めると収束が大幅に速くなる。ヒントはあくまで初期解の
+        候補であり、制約に違反する部分はソルバーが修復する。
+        """
+        hinted = 0
+        for (part_num, line, month), var in self.x.items():
+            monthly = self.hint_allocation.get(part_num, {}).get(line)
+            self.model.AddHint(var, monthly[month] if monthly else 0)
+            hinted += 1
+        print(f"  探索ヒント設定: {hinted}変数")
+
     def solve(self) -> OptimizationResult:
         """最適化を実行"""
         print(f"\n最適化実行中（制限時間: {self.time_limit}秒）...")
@@ -374,6 +398,7 @@ def optimize(
     capacities: dict[str, int | list[int]] | None = None,
     time_limit: int = DEFAULT_TIME_LIMIT_SECONDS,
     load_rate_limit: float = 1.0,
+    hint_allocation: dict | None = None,
 ) -> OptimizationResult:
     """
     最適化を実行するヘルパー関数
@@ -384,11 +409,14 @@ def optimize(
         capacities: ライン能力辞書（オプション）
         time_limit: ソルバー制限時間（秒）
         load_rate_limit: 負荷率上限（0.0〜1.0、デフォルト1.0=100%）
+        hint_allocation: 探索ヒントに使う既存の割当（オプション）
 
     Returns:
         OptimizationResult
     """
-    optimizer = LineOptimizer(specs, demands, capacities, time_limit, load_rate_limit)
+    optimizer = LineOptimizer(
+        specs, demands, capacities, time_limit, load_rate_limit, hint_allocation
+    )
     optimizer.build_model()
     return optimizer.solve()
 